@@ -0,0 +1,383 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# charts are rendered to files only
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pandas as pd
+
+from bookmarkanalytic import Bookstore, generate_synthetic_data
+
+
+def make_books(n_books):
+    return [
+        {"title": f"Book {i:07d}", "author": f"Author {i % 997}", "genre": f"Genre {i % 13}",
+         "price": 5.0 + (i % 40), "qty": 1_000_000}
+        for i in range(n_books)
+    ]
+
+
+def build_store(n_books, columnar=False):
+    store = Bookstore(columnar=columnar)
+    store._set_inventory(make_books(n_books))
+    return store
+
+
+def bench_record_sale(n_books, n_sales=20_000, columnar=False):
+    """Sales per second against a catalog of n_books titles."""
+    store = build_store(n_books, columnar)
+    # spread sales over the whole catalog, including the tail that a
+    # linear scan reaches last
+    step = max(1, n_books // n_sales)
+    titles = [store.inventory[(i * step) % n_books]["title"] for i in range(n_sales)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        for t in titles:
+            store.record_sale(t, 1, date="2025-01-01")
+        elapsed = time.perf_counter() - t0
+    return n_sales / elapsed
+
+
+def bench_record_sales_bulk(n_books, n_sales=20_000, columnar=False):
+    """Sales per second through the batch record_sales path."""
+    store = build_store(n_books, columnar)
+    step = max(1, n_books // n_sales)
+    rows = [(store.inventory[(i * step) % n_books]["title"], 1, "2025-01-01") for i in range(n_sales)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        store.record_sales(rows)
+        elapsed = time.perf_counter() - t0
+    return n_sales / elapsed
+
+
+def bench_inventory_memory(n_books, columnar):
+    """Bytes allocated to hold n_books in the inventory (title index included)."""
+    tracemalloc.start()
+    store = Bookstore(columnar=columnar)
+    store._set_inventory(make_books(n_books))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def bench_total_stock(n_books, columnar, repeat=20):
+    store = build_store(n_books, columnar)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        store._total_stock()
+    return (time.perf_counter() - t0) / repeat
+
+
+def bench_report(n_sales, repeat=50):
+    """Seconds per generate_report and per monthly_revenue call with an n_sales ledger."""
+    store = build_store(1_000)
+    store._set_sales(
+        {"date": f"{2000 + i % 25}-{1 + i % 12:02d}-01", "title": f"Book {i % 1_000:07d}", "qty": 1, "revenue": 9.99}
+        for i in range(n_sales)
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            # a fresh version each time, or every call after the first
+            # is a result-cache hit
+            store._bump_version()
+            store.generate_report()
+        t1 = time.perf_counter()
+        for _ in range(repeat):
+            store.monthly_revenue()
+        t2 = time.perf_counter()
+    return (t1 - t0) / repeat, (t2 - t1) / repeat
+
+
+def legacy_load_sales(filename):
+    """The row-by-row iterrows loader the vectorized one replaced."""
+    df = pd.read_csv(filename)
+    sales = []
+    for _, row in df.iterrows():
+        sales.append({
+            "date": str(row.get("date", row.get("Date", ""))),
+            "title": str(row.get("title", row.get("Title", ""))),
+            "qty": int(row.get("qty", row.get("Quantity Sold", 0))),
+            "revenue": float(row.get("revenue", row.get("Total Revenue", 0.0)))
+        })
+    return sales
+
+
+def bench_load_sales(n_sales):
+    """Seconds to load an n_sales CSV: (iterrows, vectorized, chunked)."""
+    store = build_store(1_000)
+    store._set_sales(
+        {"date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "title": f"Book {i % 1_000:07d}",
+         "qty": 1 + i % 3, "revenue": 9.99 * (1 + i % 3)}
+        for i in range(n_sales)
+    )
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.save_sales_csv(path)
+            t0 = time.perf_counter()
+            legacy_load_sales(path)
+            t1 = time.perf_counter()
+            store.load_sales_csv(path)
+            t2 = time.perf_counter()
+            store.load_sales_csv(path, chunksize=50_000)
+            t3 = time.perf_counter()
+    finally:
+        os.remove(path)
+    return t1 - t0, t2 - t1, t3 - t2
+
+
+def bench_startup(n_sales):
+    """Seconds to restore a store from CSV vs from a binary snapshot."""
+    store = build_store(10_000)
+    store._set_sales(
+        {"date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "title": f"Book {i % 10_000:07d}",
+         "qty": 1, "revenue": 9.99}
+        for i in range(n_sales)
+    )
+    tmp = tempfile.mkdtemp()
+    inv, sales, snap = (os.path.join(tmp, n) for n in ("inventory.csv", "sales.csv", "snap"))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.save_inventory_csv(inv)
+            store.save_sales_csv(sales)
+            store.save_snapshot(snap)
+            t0 = time.perf_counter()
+            fresh = Bookstore()
+            fresh.load_inventory_csv(inv)
+            fresh.load_sales_csv(sales)
+            t1 = time.perf_counter()
+            Bookstore().load_snapshot(snap)
+            t2 = time.perf_counter()
+    finally:
+        shutil.rmtree(tmp)
+    return t1 - t0, t2 - t1
+
+
+def bench_threads(n_threads, n_books=1_000, sales_per_thread=5_000):
+    """Concurrent record_sale throughput on a thread-safe store.
+
+    Stock is sized so the threads together try to buy more copies than
+    exist; returns (sales/s, lowest qty left, copies sold == copies
+    removed from stock).
+    """
+    store = Bookstore(thread_safe=True)
+    stock = n_threads * sales_per_thread // n_books // 2 + 1
+    books = make_books(n_books)
+    for b in books:
+        b["qty"] = stock
+    store._set_inventory(books)
+    titles = [b["title"] for b in books]
+
+    def worker(k):
+        for i in range(sales_per_thread):
+            try:
+                store.record_sale(titles[(i * 7 + k * 13) % n_books], 1, date="2025-01-01")
+            except ValueError:
+                pass
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(n_threads)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+    left = [b["qty"] for b in store.inventory]
+    consistent = sum(s["qty"] for s in store.sales) == n_books * stock - sum(left)
+    return n_threads * sales_per_thread / elapsed, min(left), consistent
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def bench_cold_start(repeat=5):
+    """Wall seconds for `bookmarkanalytic.py report` in a fresh interpreter.
+
+    Returns (report, eager_imports): the second number is what a process
+    pays just to import pandas, NumPy and pyplot, which the module used
+    to do unconditionally before any command ran.
+    """
+    tmp = tempfile.mkdtemp()
+    try:
+        store = build_store(100)
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.save_inventory_csv(os.path.join(tmp, "inventory.csv"))
+            store.save_sales_csv(os.path.join(tmp, "sales.csv"))
+
+        def run(cmd):
+            best = float("inf")
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                subprocess.run(cmd, cwd=tmp, check=True, stdout=subprocess.DEVNULL)
+                best = min(best, time.perf_counter() - t0)
+            return best
+
+        report = run([sys.executable, os.path.join(HERE, "bookmarkanalytic.py"), "report"])
+        eager = run([sys.executable, "-c", "import pandas, numpy, matplotlib.pyplot"])
+    finally:
+        shutil.rmtree(tmp)
+    return report, eager
+
+
+SUITE_OPS = ("add_book", "update_book", "record_sale", "remove_book", "report", "total_revenue_numpy",
+             "save_csv", "load_csv", "plot_monthly", "plot_genre")
+
+
+def bench_suite(n_rows, seed=0, ops=200):
+    """Seconds per call of every Bookstore operation on seeded synthetic data.
+
+    The store holds n_rows books and n_rows sales from
+    generate_synthetic_data(seed), so repeated runs time identical work.
+    """
+    store = Bookstore()
+    tmp = tempfile.mkdtemp()
+    inv, sales = os.path.join(tmp, "inventory.csv"), os.path.join(tmp, "sales.csv")
+    new = [f"Bench Title {i}" for i in range(ops)]
+    removes = min(ops, 20)  # each removal reindexes the catalog
+    results = {}
+
+    def timed(name, calls, fn):
+        t0 = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        results[name] = (time.perf_counter() - t0) / calls
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_synthetic_data(store, n_rows, n_rows, seed)
+            timed("add_book", ops, lambda i: store.add_book(new[i], "Bench", "Bench", 10.0, 1_000_000))
+            timed("update_book", ops, lambda i: store.update_book(new[i], price=12.5))
+            timed("record_sale", ops, lambda i: store.record_sale(new[i], 1, date="2025-06-01"))
+            timed("remove_book", removes, lambda i: store.remove_book(new[i]))
+            # report timings are of the computation, not the result cache
+            timed("report", 20, lambda i: (store._bump_version(), store.generate_report()))
+            timed("total_revenue_numpy", 3, lambda i: (store._bump_version(), store.total_revenue_numpy()))
+            timed("save_csv", 1, lambda i: (store.save_inventory_csv(inv), store.save_sales_csv(sales)))
+            timed("load_csv", 1, lambda i: (store.load_inventory_csv(inv), store.load_sales_csv(sales)))
+            timed("plot_monthly", 1, lambda i: store.plot_monthly_sales(os.path.join(tmp, "monthly.png")))
+            timed("plot_genre", 1, lambda i: store.plot_genre_revenue_bar(os.path.join(tmp, "genre.png")))
+    finally:
+        shutil.rmtree(tmp)
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, seed=0, json_path=None, compare=None):
+    # import pyplot up front so the smallest size doesn't pay for it
+    import matplotlib.pyplot  # noqa: F401
+    results = {}
+    print(f"{'Rows':>10} " + " ".join(f"{op:>12.12}" for op in SUITE_OPS) + "   (ms per call)")
+    for n in sizes:
+        timings = bench_suite(n, seed)
+        results[str(n)] = timings
+        print(f"{n:>10} " + " ".join(f"{timings[op] * 1e3:>12.3f}" for op in SUITE_OPS))
+
+    doc = {
+        "meta": {"commit": _git_commit(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "platform": platform.platform(), "seed": seed},
+        "results": results,
+    }
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"\nWrote {json_path}")
+
+    if compare:
+        with open(compare, encoding="utf-8") as f:
+            base = json.load(f)
+        print(f"\nRatio to {compare} (commit {base['meta'].get('commit')}); >1 is slower")
+        print(f"{'Rows':>10} " + " ".join(f"{op:>12.12}" for op in SUITE_OPS))
+        for n, timings in results.items():
+            old = base["results"].get(n)
+            if old is None:
+                continue
+            cells = []
+            for op in SUITE_OPS:
+                if old.get(op):
+                    ratio = timings[op] / old[op]
+                    cells.append(f"{ratio:>11.2f}{'!' if ratio > 1.2 else ' '}")
+                else:
+                    cells.append(f"{'-':>12}")
+            print(f"{n:>10} " + " ".join(cells))
+    return doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bookstore micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--sales", type=int, default=20_000)
+    parser.add_argument("--columnar", action="store_true", help="use the columnar inventory backend")
+    parser.add_argument("--suite", action="store_true",
+                        help="time every operation on seeded synthetic data (sizes up to 1e7 rows) instead")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic data seed for --suite")
+    parser.add_argument("--json", metavar="FILE", help="write --suite results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="print --suite timings relative to an earlier JSON run")
+    args = parser.parse_args()
+
+    if args.suite:
+        run_suite(args.sizes, args.seed, args.json, args.compare)
+        return
+
+    report, eager = bench_cold_start()
+    print(f"Cold start: `report` {report * 1e3:.0f} ms; eager pandas+NumPy+pyplot import alone {eager * 1e3:.0f} ms\n")
+
+    print(f"{'Catalog':>10} {'Sales/s':>12} {'Bulk sales/s':>13}")
+    for n in args.sizes:
+        rate = bench_record_sale(n, args.sales, args.columnar)
+        bulk = bench_record_sales_bulk(n, args.sales, args.columnar)
+        print(f"{n:>10} {rate:>12,.0f} {bulk:>13,.0f}")
+
+    print(f"\n{'Threads':>10} {'Attempts/s':>12} {'Min qty':>8} {'Consistent':>11}")
+    for n in (1, 2, 4, 8):
+        rate, low, ok = bench_threads(n)
+        print(f"{n:>10} {rate:>12,.0f} {low:>8} {str(ok):>11}")
+
+    print(f"\n{'Catalog':>10} {'Dict MB':>9} {'Column MB':>10} {'Dict sum ms':>12} {'Column sum ms':>14}")
+    for n in args.sizes:
+        mem_d = bench_inventory_memory(n, False) / 1e6
+        mem_c = bench_inventory_memory(n, True) / 1e6
+        sum_d = bench_total_stock(n, False) * 1e3
+        sum_c = bench_total_stock(n, True) * 1e3
+        print(f"{n:>10} {mem_d:>9.1f} {mem_c:>10.1f} {sum_d:>12.3f} {sum_c:>14.3f}")
+
+    print(f"\n{'Ledger':>10} {'Report ms':>10} {'Monthly ms':>11}")
+    for n in args.sizes:
+        report, monthly = bench_report(n)
+        print(f"{n:>10} {report * 1e3:>10.3f} {monthly * 1e3:>11.3f}")
+
+    print(f"\n{'Sales CSV':>10} {'iterrows s':>11} {'Vector s':>9} {'Chunked s':>10}")
+    for n in args.sizes:
+        old, new, chunked = bench_load_sales(n)
+        print(f"{n:>10} {old:>11.3f} {new:>9.3f} {chunked:>10.3f}")
+
+    print(f"\n{'Sales':>10} {'CSV start s':>12} {'Snapshot s':>11}")
+    for n in args.sizes:
+        csv_s, snap_s = bench_startup(n)
+        print(f"{n:>10} {csv_s:>12.3f} {snap_s:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
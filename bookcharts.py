@@ -0,0 +1,113 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from bookmarkanalytic import CHARTS, Bookstore
+
+MANIFEST = "charts.json"
+
+
+def _use_agg():
+    # must run before pyplot is imported in this process
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def render_chart(chart, data, paths):
+    """Draw one chart from its chart_data and save it to every path."""
+    _use_agg()
+    import matplotlib.pyplot as plt
+    draw, _ = CHARTS[chart]
+    draw(data)
+    for path in paths:
+        plt.savefig(path)
+    plt.close("all")
+    return paths
+
+
+def data_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def render_chart_pack(stores, outdir, formats=("png", "svg"), processes=None, charts=None):
+    """Render every chart for every store into outdir/<store name>/.
+
+    stores maps a name to a Bookstore.  Chart inputs are gathered in this
+    process (they are small aggregates), hashed, and compared with the
+    hashes recorded in each store's charts.json; only charts whose input
+    changed or whose files are missing are drawn, spread over a process
+    pool with the Agg backend so no display is needed.  Returns
+    (rendered, skipped) counts.
+    """
+    jobs = []
+    manifests = {}
+    skipped = 0
+    for name, store in stores.items():
+        target = os.path.join(outdir, name)
+        os.makedirs(target, exist_ok=True)
+        manifest_path = os.path.join(target, MANIFEST)
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            old = {}
+        new = manifests[manifest_path] = {}
+        for chart in charts or CHARTS:
+            data = store.chart_data(chart)
+            if data is None:
+                continue
+            digest = data_hash(data)
+            paths = [os.path.join(target, f"{chart}.{fmt}") for fmt in formats]
+            new[chart] = digest
+            if old.get(chart) == digest and all(os.path.exists(p) for p in paths):
+                skipped += 1
+                continue
+            jobs.append((chart, data, paths))
+
+    if len(jobs) > 1 and processes != 1:
+        with ProcessPoolExecutor(processes, initializer=_use_agg) as pool:
+            list(pool.map(render_chart, *zip(*jobs)))
+    else:
+        for job in jobs:
+            render_chart(*job)
+
+    # record hashes only once the files are written
+    for path, hashes in manifests.items():
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(hashes, f, indent=2, sort_keys=True)
+    return len(jobs), skipped
+
+
+def load_store(source):
+    """A store from a SQLite .db file or a directory of inventory.csv/sales.csv."""
+    if source.endswith(".db"):
+        from booksqlite import SQLiteBookstore
+        return SQLiteBookstore(source)
+    store = Bookstore()
+    store.load_inventory_csv(os.path.join(source, "inventory.csv"))
+    store.load_sales_csv(os.path.join(source, "sales.csv"))
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the chart pack for one or more stores, headless.")
+    parser.add_argument("stores", nargs="+", help="store directories (inventory.csv + sales.csv) or .db files")
+    parser.add_argument("--out", default="charts", help="output directory (default: %(default)s)")
+    parser.add_argument("--format", nargs="+", default=["png", "svg"], choices=["png", "svg", "pdf"])
+    parser.add_argument("--jobs", type=int, help="render processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    stores = {}
+    for source in args.stores:
+        name = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+        stores[name] = load_store(source)
+    rendered, skipped = render_chart_pack(stores, args.out, args.format, args.jobs)
+    print(f"Rendered {rendered} charts, {skipped} unchanged, into {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from bookmarkanalytic import Bookstore
+from bookserver import BookstoreService
+
+
+async def _request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n"
+                 .encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, titles, n_requests, report_share, latencies, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n_requests):
+            if rng.random() < report_share:
+                kind, args = "report", ("GET", "/report")
+            else:
+                kind, args = "sale", ("POST", "/sales", {"title": rng.choice(titles), "qty": 1, "date": "2025-01-01"})
+            t0 = time.perf_counter()
+            await _request(reader, writer, *args)
+            latencies[kind].append(time.perf_counter() - t0)
+    finally:
+        writer.close()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+async def run(args):
+    service = None
+    if args.port is None:
+        # no server given: start one in-process on a scratch store
+        store = Bookstore()
+        store._set_inventory(
+            {"title": f"Book {i:05d}", "author": f"Author {i % 97}", "genre": f"Genre {i % 7}",
+             "price": 5.0 + i % 40, "qty": 10_000_000}
+            for i in range(args.books)
+        )
+        service = BookstoreService(store, batch_window=args.batch_window)
+        server = await service.start(args.host, 0)
+        port = server.sockets[0].getsockname()[1]
+        titles = [b["title"] for b in store.inventory]
+    else:
+        port = args.port
+        reader, writer = await asyncio.open_connection(args.host, port)
+        writer.write(b"GET /inventory HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        raw = await reader.read()
+        titles = [b["title"] for b in json.loads(raw.split(b"\r\n\r\n", 1)[1])["books"]]
+        writer.close()
+
+    latencies = {"sale": [], "report": []}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        client(args.host, port, titles, args.requests, args.report_share, latencies, seed)
+        for seed in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - t0
+    if service is not None:
+        server.close()
+        await server.wait_closed()
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{total} requests from {args.clients} clients in {elapsed:.2f}s ({total / elapsed:,.0f} req/s)")
+    if service is not None:
+        print(f"sales written in {service.batches} batches")
+    print(f"{'Endpoint':>10} {'Count':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for kind, values in latencies.items():
+        if values:
+            print(f"{kind:>10} {len(values):>8} {percentile(values, 50) * 1e3:>8.2f} {percentile(values, 99) * 1e3:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a bookserver instance")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="server to hit (default: start one in-process)")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--report-share", type=float, default=0.2, help="fraction of requests that are reports")
+    parser.add_argument("--books", type=int, default=1_000)
+    parser.add_argument("--batch-window", type=float, default=0.002)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,66 @@
+from array import array
+import argparse
+import bisect
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext, redirect_stdout
 import csv
-from datetime import datetime
+from datetime import date as _date, datetime
+import functools
+import heapq
+import importlib
+import io
+import itertools
+import json
 import os
+import random
+import shutil
+import sys
+import threading
+import time
 
-try:
-    import pandas as pd
-except Exception:
-    pd = None
 
-try:
-    import numpy as np
-except Exception:
-    np = None
+class _LazyModule:
+    """Stand-in for a heavy optional module, imported on first use; truthy if installed."""
 
-import matplotlib.pyplot as plt
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._tried = False
+
+    def _load(self):
+        if not self._tried:
+            self._tried = True
+            try:
+                self._module = importlib.import_module(self._name)
+            except Exception:
+                self._module = None
+        return self._module
+
+    def __bool__(self):
+        return self._load() is not None
+
+    def __getattr__(self, attr):
+        module = self._load()
+        if module is None:
+            raise ImportError(f"{self._name} is not installed.")
+        return getattr(module, attr)
+
+
+pd = _LazyModule("pandas")
+np = _LazyModule("numpy")
+plt = _LazyModule("matplotlib.pyplot")
+
+# Below this size the csv module parses a file faster than pandas can
+# even be imported, so pandas is only brought in for bigger files.
+PANDAS_MIN_BYTES = 1 << 20
+
+
+def _use_pandas(filename=None):
+    if "pandas" in sys.modules:
+        return bool(pd)
+    if filename is not None and os.path.getsize(filename) >= PANDAS_MIN_BYTES:
+        return bool(pd)
+    return False
 
 def positive_float(x, name="value"):
     try:
@@ -32,26 +80,1730 @@ def positive_int(x, name="value"):
         raise ValueError(f"{name} must be non-negative.")
     return v
 
-class Bookstore:
+def _parse_date(text):
+    """The sale date as a date, or None when it isn't YYYY-MM-DD."""
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").date()
+    except Exception:
+        return None
+
+def _day_ordinal(day):
+    if isinstance(day, str):
+        d = _parse_date(day)
+        if d is None:
+            raise ValueError(f"Dates must be YYYY-MM-DD, got {day!r}.")
+        day = d
+    return day.toordinal()
+
+def _months_from_days(daily):
+    """Fold {day: revenue} into {"YYYY-MM": revenue}; days are ordinals or ISO strings."""
+    months = {}
+    for day, rev in daily.items():
+        month = day[:7] if isinstance(day, str) else _date.fromordinal(day).strftime("%Y-%m")
+        months[month] = months.get(month, 0.0) + rev
+    return months
+
+def _quiet(fn, *args, **kwargs):
+    """Call fn with its progress prints discarded (swaps sys.stdout process-wide)."""
+    with redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+INVENTORY_FIELDS = ("title", "author", "genre", "price", "qty")
+SALES_FIELDS = ("date", "title", "qty", "revenue", "genre")
+SNAPSHOT_VERSION = 3
+
+
+def _write_atomic(filename, write):
+    """Call write(path) on a temp file next to filename, then swap it in."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    tmp = os.path.join(directory, f".{os.path.basename(filename)}.tmp")
+    write(tmp)
+    with open(tmp, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+
+def _write_csv_rows(path, fieldnames, rows):
+    with open(path, "w", newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class Journal:
+    """Append-only CSV log next to a snapshot CSV, fsync'd every sync_every rows."""
+
+    def __init__(self, snapshot, fields, sync_every=64):
+        self.snapshot = os.path.abspath(snapshot)
+        self.path = self.snapshot + ".journal"
+        self.old_path = self.path + ".old"
+        self.fields = list(fields)
+        self.sync_every = sync_every
+        self.rows = len(self.read(self.path))
+        self._pending = 0
+        self._open()
+
+    def _open(self):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._f = open(self.path, "a", newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._f, fieldnames=self.fields, extrasaction="ignore")
+        if new:
+            self._writer.writeheader()
+
+    @staticmethod
+    def read(path):
+        if not os.path.exists(path):
+            return []
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def old_is_pending(self):
+        # rotate() stamps the old log, and compaction only replaces the
+        # snapshot after that, so an old log newer than the snapshot has
+        # not been folded in yet
+        if not os.path.exists(self.old_path):
+            return False
+        if not os.path.exists(self.snapshot):
+            return True
+        return os.path.getmtime(self.old_path) > os.path.getmtime(self.snapshot)
+
+    def append(self, row):
+        self._writer.writerow(row)
+        self.rows += 1
+        self._pending += 1
+        if self._pending >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._pending = 0
+
+    def rotate(self):
+        self.sync()
+        self._f.close()
+        os.replace(self.path, self.old_path)
+        os.utime(self.old_path)
+        self.rows = 0
+        self._open()
+
+    def discard_old(self):
+        if os.path.exists(self.old_path):
+            os.remove(self.old_path)
+
+    def close(self):
+        self.sync()
+        self._f.close()
+
+
+def _pack_strings(values):
+    """Pack a list of str into one NUL-separated UTF-8 uint8 array."""
+    return np.frombuffer("\0".join(values).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack_strings(arr, count):
+    if count == 0:
+        return []
+    return arr.tobytes().decode("utf-8").split("\0")
+
+
+def _encode_categories(values):
+    """First-seen-order category table and int32 codes for values."""
+    if "pandas" in sys.modules and pd:
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        return codes.astype(np.int32), list(uniques)
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in values), dtype=np.int32, count=len(values))
+    return codes, list(lookup)
+
+
+class _BookRow:
+    """Dict-like view of one row of a ColumnarInventory."""
+    __slots__ = ("_inv", "_i")
+
+    def __init__(self, inv, i):
+        self._inv = inv
+        self._i = i
+
+    def __getitem__(self, key):
+        return self._inv._get(self._i, key)
+
+    def __setitem__(self, key, value):
+        self._inv._set(self._i, key, value)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(ColumnarInventory.FIELDS)
+
+    def to_dict(self):
+        return {k: self[k] for k in ColumnarInventory.FIELDS}
+
+
+class _ColumnStore:
+    """Shared plumbing for the NumPy-backed column stores."""
+
+    COLUMNS = ()
+
+    def _code(self, table, lookup, value):
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(table)
+            table.append(value)
+        return code
+
+    def _grow(self, need):
+        cap = len(getattr(self, self.COLUMNS[0]))
+        if need <= cap:
+            return
+        cap = max(need, cap * 2)
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+
+class ColumnarInventory(_ColumnStore):
+    """List-of-books look-alike that stores each field as a column."""
+
+    FIELDS = INVENTORY_FIELDS
+    COLUMNS = ("_author_codes", "_genre_codes", "_price", "_qty")
+
+    def __init__(self, capacity=1024):
+        if not np:
+            raise RuntimeError("NumPy is required for the columnar inventory.")
+        self._n = 0
+        self.titles = []
+        self._author_codes = np.empty(capacity, dtype=np.int32)
+        self._genre_codes = np.empty(capacity, dtype=np.int32)
+        self._price = np.empty(capacity, dtype=np.float64)
+        self._qty = np.empty(capacity, dtype=np.int64)
+        self.authors, self._author_lookup = [], {}
+        self.genres, self._genre_lookup = [], {}
+
+    @classmethod
+    def from_columns(cls, cols):
+        """Build from {field: sequence} columns without per-row work."""
+        n = len(cols["title"])
+        inv = cls(capacity=max(1024, n))
+        inv.titles = list(cols["title"])
+        for field, table, lookup, codes in (
+            ("author", inv.authors, inv._author_lookup, inv._author_codes),
+            ("genre", inv.genres, inv._genre_lookup, inv._genre_codes),
+        ):
+            if _use_pandas():
+                c, uniques = pd.factorize(pd.Series(cols[field], dtype=object))
+                values = list(uniques)
+            else:
+                lookup_tmp = {}
+                c = [lookup_tmp.setdefault(v, len(lookup_tmp)) for v in cols[field]]
+                values = list(lookup_tmp)
+            table.extend(values)
+            lookup.update((v, i) for i, v in enumerate(values))
+            codes[:n] = c
+        inv._price[:n] = cols["price"]
+        inv._qty[:n] = cols["qty"]
+        inv._n = n
+        return inv
+
+    @classmethod
+    def from_records(cls, records):
+        inv = cls(capacity=max(1024, len(records)))
+        for r in records:
+            inv.append(r)
+        return inv
+
+    def _get(self, i, key):
+        if key == "title":
+            return self.titles[i]
+        if key == "author":
+            return self.authors[self._author_codes[i]]
+        if key == "genre":
+            return self.genres[self._genre_codes[i]]
+        if key == "price":
+            return float(self._price[i])
+        if key == "qty":
+            return int(self._qty[i])
+        raise KeyError(key)
+
+    def _set(self, i, key, value):
+        if key == "title":
+            self.titles[i] = value
+        elif key == "author":
+            self._author_codes[i] = self._code(self.authors, self._author_lookup, value)
+        elif key == "genre":
+            self._genre_codes[i] = self._code(self.genres, self._genre_lookup, value)
+        elif key == "price":
+            self._price[i] = value
+        elif key == "qty":
+            self._qty[i] = value
+        else:
+            raise KeyError(key)
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("inventory index out of range")
+        return _BookRow(self, i)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield _BookRow(self, i)
+
+    def append(self, book):
+        self._grow(self._n + 1)
+        i = self._n
+        self.titles.append(book["title"])
+        self._author_codes[i] = self._code(self.authors, self._author_lookup, book["author"])
+        self._genre_codes[i] = self._code(self.genres, self._genre_lookup, book["genre"])
+        self._price[i] = book["price"]
+        self._qty[i] = book["qty"]
+        self._n += 1
+
+    def pop(self, i):
+        if i < 0:
+            i += self._n
+        row = self[i].to_dict()
+        n = self._n
+        for name in self.COLUMNS:
+            col = getattr(self, name)
+            col[i:n - 1] = col[i + 1:n]
+        self.titles.pop(i)
+        self._n -= 1
+        return row
+
+    @property
+    def price(self):
+        return self._price[:self._n]
+
+    @property
+    def qty(self):
+        return self._qty[:self._n]
+
+    def total_qty(self):
+        return int(self.qty.sum())
+
+    def to_records(self):
+        return [self[i].to_dict() for i in range(self._n)]
+
+    def to_columns(self):
+        return {
+            "title": list(self.titles),
+            "author": [self.authors[c] for c in self._author_codes[:self._n]],
+            "genre": [self.genres[c] for c in self._genre_codes[:self._n]],
+            "price": self.price.copy(),
+            "qty": self.qty.copy(),
+        }
+
+
+class SalesLedger(_ColumnStore):
+    """List-of-sales look-alike that stores each field as a NumPy column."""
+
+    FIELDS = SALES_FIELDS
+    COLUMNS = ("_day", "_title_codes", "_genre_codes", "_qty", "_cents")
+
+    def __init__(self, capacity=1024):
+        if not np:
+            raise RuntimeError("NumPy is required for the columnar sales ledger.")
+        self._n = 0
+        self._day = np.empty(capacity, dtype=np.int32)
+        self._title_codes = np.empty(capacity, dtype=np.int32)
+        self._genre_codes = np.empty(capacity, dtype=np.int32)
+        self._qty = np.empty(capacity, dtype=np.int32)
+        self._cents = np.empty(capacity, dtype=np.int64)
+        self.titles, self._title_lookup = [], {}
+        self.genres, self._genre_lookup = [], {}
+        self._odd_dates = {}
+        self._day_lookup = {}
+        self._day_text = {}
+
+    @classmethod
+    def from_records(cls, records):
+        ledger = cls()
+        ledger.extend(records)
+        return ledger
+
+    @classmethod
+    def from_codes(cls, days, odd_dates, title_codes, titles, genre_codes, genres, qty, cents):
+        """Build from snapshot columns; odd_dates maps rows with non-canonical dates to their text."""
+        n = len(days)
+        ledger = cls(capacity=max(1024, n))
+        ledger.titles = list(titles)
+        ledger._title_lookup = {t: i for i, t in enumerate(ledger.titles)}
+        ledger.genres = list(genres)
+        ledger._genre_lookup = {g: i for i, g in enumerate(ledger.genres)}
+        ledger._day[:n] = days
+        ledger._title_codes[:n] = title_codes
+        ledger._genre_codes[:n] = genre_codes
+        ledger._qty[:n] = qty
+        ledger._cents[:n] = cents
+        ledger._odd_dates = dict(odd_dates)
+        ledger._n = n
+        return ledger
+
+    def _encode_day(self, text):
+        hit = self._day_lookup.get(text)
+        if hit is None:
+            d = _parse_date(text)
+            hit = self._day_lookup[text] = (d.toordinal(), d.isoformat() == text) if d else (-1, False)
+        return hit
+
+    def _date(self, i):
+        text = self._odd_dates.get(i)
+        if text is not None:
+            return text
+        day = int(self._day[i])
+        text = self._day_text.get(day)
+        if text is None:
+            text = self._day_text[day] = _date.fromordinal(day).isoformat()
+        return text
+
+    def append(self, sale):
+        self._grow(self._n + 1)
+        i = self._n
+        day, canonical = self._encode_day(sale["date"])
+        if not canonical:
+            self._odd_dates[i] = sale["date"]
+        self._day[i] = day
+        self._title_codes[i] = self._code(self.titles, self._title_lookup, sale["title"])
+        self._genre_codes[i] = self._code(self.genres, self._genre_lookup, sale.get("genre") or "")
+        self._qty[i] = sale["qty"]
+        self._cents[i] = round(sale["revenue"] * 100)
+        self._n += 1
+
+    def extend(self, sales):
+        for sale in sales:
+            self.append(sale)
+
+    def extend_columns(self, dates, date_codes, titles, title_codes, genres, genre_codes, qty, revenue):
+        """Append rows given as arrays; each *_codes array indexes its table."""
+        n = len(date_codes)
+        start = self._n
+        self._grow(start + n)
+        encoded = [self._encode_day(text) for text in dates]
+        days = np.array([d for d, _ in encoded], dtype=np.int32)
+        odd = np.array([not canonical for _, canonical in encoded], dtype=bool)
+        self._day[start:start + n] = days[date_codes]
+        for i in np.flatnonzero(odd[date_codes]).tolist():
+            self._odd_dates[start + i] = dates[date_codes[i]]
+        tmap = np.array([self._code(self.titles, self._title_lookup, t) for t in titles], dtype=np.int32)
+        gmap = np.array([self._code(self.genres, self._genre_lookup, g) for g in genres], dtype=np.int32)
+        self._title_codes[start:start + n] = tmap[title_codes]
+        self._genre_codes[start:start + n] = gmap[genre_codes]
+        self._qty[start:start + n] = qty
+        self._cents[start:start + n] = np.rint(np.asarray(revenue, dtype=np.float64) * 100)
+        self._n += n
+
+    def __len__(self):
+        return self._n
+
+    def _row(self, i):
+        return {"date": self._date(i), "title": self.titles[self._title_codes[i]], "qty": int(self._qty[i]),
+                "revenue": int(self._cents[i]) / 100, "genre": self.genres[self._genre_codes[i]]}
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._row(j) for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("sales index out of range")
+        return self._row(i)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._row(i)
+
+    @property
+    def day(self):
+        return self._day[:self._n]
+
+    @property
+    def odd_dates(self):
+        """{row: date text} for the rows whose date isn't canonical YYYY-MM-DD."""
+        return self._odd_dates
+
+    @property
+    def qty(self):
+        return self._qty[:self._n]
+
+    @property
+    def revenue_cents(self):
+        return self._cents[:self._n]
+
+    @property
+    def title_codes(self):
+        return self._title_codes[:self._n]
+
+    @property
+    def genre_codes(self):
+        return self._genre_codes[:self._n]
+
+    def total_revenue(self):
+        return int(self.revenue_cents.sum()) / 100
+
+    def total_units(self):
+        return int(self.qty.sum(dtype=np.int64))
+
+    def revenue_by_title(self):
+        cents = np.bincount(self.title_codes, weights=self.revenue_cents, minlength=len(self.titles))
+        return {t: c / 100 for t, c in zip(self.titles, cents.tolist())}
+
+    def to_columns(self):
+        return {
+            "date": [self._date(i) for i in range(self._n)],
+            "title": [self.titles[c] for c in self.title_codes.tolist()],
+            "qty": self.qty.astype(np.int64),
+            "revenue": self.revenue_cents / 100,
+            "genre": [self.genres[c] for c in self.genre_codes.tolist()],
+        }
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleSearchIndex:
+    """Prefix and typo-tolerant (trigram) lookup over case-folded titles."""
+
+    FUZZY_MIN_SCORE = 0.3
+    # compact once tombstoned ids outnumber live ones by this much
+    COMPACT_SLACK = 1024
+
+    def __init__(self, titles=()):
+        self._reset(titles)
+
+    def _reset(self, titles):
+        self._keys = []          # sorted case-folded titles
+        self._titles = {}        # key -> title as written
+        self._ids = {}           # key -> id, a slot in the lists below
+        self._id_keys = []       # id -> key, None once removed
+        self._id_grams = []      # id -> number of trigrams, 0 once removed
+        self._grams = {}         # trigram -> set of live ids
+        self._gram_arrays = {}   # trigram -> id array, tombstones included
+        self._gram_counts = None  # id -> trigram count, inf once removed
+        for title in titles:
+            self._insert(title)
+        self._keys = sorted(self._titles)
+        if np:
+            self._gram_arrays = {g: np.fromiter(ids, dtype=np.int64, count=len(ids))
+                                 for g, ids in self._grams.items()}
+            self._gram_counts = np.asarray(self._id_grams, dtype=np.float64)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _insert(self, title):
+        key = title.lower()
+        if key in self._titles:
+            return None
+        self._titles[key] = title
+        grams = _trigrams(key)
+        i = len(self._id_keys)
+        self._id_keys.append(key)
+        self._id_grams.append(len(grams))
+        self._ids[key] = i
+        for g in grams:
+            self._grams.setdefault(g, set()).add(i)
+        if self._gram_counts is not None:
+            for g in grams:
+                posting = self._gram_arrays.get(g)
+                self._gram_arrays[g] = np.array([i]) if posting is None else np.append(posting, i)
+            if i == len(self._gram_counts):
+                # grow by doubling so adds don't copy the whole array
+                self._gram_counts = np.concatenate([self._gram_counts, np.empty(max(i, 16))])
+            self._gram_counts[i] = len(grams)
+        return key
+
+    def add(self, title):
+        key = self._insert(title)
+        if key is not None:
+            bisect.insort(self._keys, key)
+
+    def remove(self, title):
+        key = title.lower()
+        if self._titles.pop(key, None) is None:
+            return
+        del self._keys[bisect.bisect_left(self._keys, key)]
+        i = self._ids.pop(key)
+        self._id_keys[i] = None
+        self._id_grams[i] = 0
+        for g in _trigrams(key):
+            posting = self._grams[g]
+            posting.discard(i)
+            if not posting:
+                del self._grams[g]
+        if self._gram_counts is not None:
+            self._gram_counts[i] = np.inf
+        if len(self._id_keys) - len(self._titles) > len(self._titles) + self.COMPACT_SLACK:
+            self._reset(list(self._titles.values()))
+
+    def search(self, query, limit=10):
+        """Titles starting with query, then the closest fuzzy matches."""
+        q = query.strip().lower()
+        if not q or limit <= 0:
+            return []
+        found = []
+        i = bisect.bisect_left(self._keys, q)
+        while i < len(self._keys) and len(found) < limit and self._keys[i].startswith(q):
+            found.append(self._keys[i])
+            i += 1
+        if len(found) < limit and len(q) >= 3:
+            found.extend(self._fuzzy(q, limit - len(found), set(found)))
+        return [self._titles[k] for k in found]
+
+    def _fuzzy(self, q, limit, exclude):
+        grams = [g for g in _trigrams(q) if g in self._grams]
+        n_grams = len(_trigrams(q))
+        if not grams:
+            return []
+        if np:
+            shared = np.bincount(np.concatenate([self._gram_arrays[g] for g in grams]),
+                                 minlength=len(self._id_keys))
+            ids = np.flatnonzero(shared)
+            scores = shared[ids] / (n_grams + self._gram_counts[ids] - shared[ids])
+            keep = scores >= self.FUZZY_MIN_SCORE
+            ids, scores = ids[keep], scores[keep]
+            k = min(len(ids), limit + len(exclude))
+            if k < len(ids):
+                # keep everything tied with the k-th best so the final
+                # order by (score, title) doesn't depend on the partition
+                cutoff = np.partition(scores, len(scores) - k)[len(scores) - k]
+                keep = scores >= cutoff
+                ids, scores = ids[keep], scores[keep]
+            scored = [(s, self._id_keys[i]) for s, i in zip(scores.tolist(), ids.tolist())]
+        else:
+            shared = {}
+            for g in grams:
+                for i in self._grams[g]:
+                    shared[i] = shared.get(i, 0) + 1
+            scored = []
+            for i, c in shared.items():
+                score = c / (n_grams + self._id_grams[i] - c)
+                if score >= self.FUZZY_MIN_SCORE:
+                    scored.append((score, self._id_keys[i]))
+        scored = [sk for sk in scored if sk[1] not in exclude]
+        return [k for _, k in heapq.nsmallest(limit, scored, key=lambda sk: (-sk[0], sk[1]))]
+
+
+# canonical field -> (accepted header names, dtype, default)
+INVENTORY_COLUMNS = {
+    "title": (("title", "Title"), str, ""),
+    "author": (("author", "Author"), str, ""),
+    "genre": (("genre", "Genre"), str, ""),
+    "price": (("price", "Price"), float, 0.0),
+    "qty": (("qty", "Quantity"), int, 0),
+}
+
+SALES_COLUMNS = {
+    "date": (("date", "Date"), str, ""),
+    "title": (("title", "Title"), str, ""),
+    "qty": (("qty", "Quantity Sold"), int, 0),
+    "revenue": (("revenue", "Total Revenue"), float, 0.0),
+    "genre": (("genre", "Genre"), str, ""),
+}
+
+
+def _resolve_columns(header, spec):
+    """Map each canonical field to the first matching header name, or None."""
+    present = set(header)
+    names = {}
+    for field, (aliases, _, _) in spec.items():
+        names[field] = next((a for a in aliases if a in present), None)
+    return names
+
+
+def _csv_field(row, name, default):
+    # DictReader files extra values under the None key, so a field with
+    # no matching header must not look that up
+    return row.get(name, default) if name is not None else default
+
+
+def _read_csv_columns(filename, spec, chunksize=None):
+    """Read a CSV with pandas into {field: ndarray} using the column spec, or yield chunks."""
+    header = pd.read_csv(filename, nrows=0).columns
+    names = _resolve_columns(header, spec)
+    usecols = [n for n in names.values() if n is not None]
+    dtype = {names[f]: (str if t is str else "float64") for f, (_, t, _) in spec.items() if names[f]}
+
+    def convert(df):
+        cols = {}
+        for field, (_, typ, default) in spec.items():
+            name = names[field]
+            if name is None:
+                cols[field] = np.full(len(df), default, dtype=object if typ is str else typ)
+            elif typ is str:
+                cols[field] = df[name].fillna("").to_numpy(dtype=object)
+            else:
+                values = df[name].to_numpy(dtype=np.float64)
+                # the csv module path fails on these rows too; casting a
+                # NaN to int64 would silently give a huge negative number
+                bad = ~np.isfinite(values) if typ is int else np.isnan(values)
+                if bad.any():
+                    line = int(df.index[bad.argmax()]) + 2
+                    raise ValueError(f"{filename}: {name} is blank or not a number on line {line}.")
+                cols[field] = values.astype(np.int64) if typ is int else values
+        return cols
+
+    reader = pd.read_csv(filename, usecols=usecols, dtype=dtype, chunksize=chunksize)
+    if chunksize:
+        return (convert(chunk) for chunk in reader)
+    return convert(reader)
+
+
+def _columns_to_records(cols, spec):
+    fields = list(spec)
+    columns = [cols[f].tolist() if hasattr(cols[f], "tolist") else cols[f] for f in fields]
+    return [dict(zip(fields, row)) for row in zip(*columns)]
+
+
+def _journal_sales(rows):
+    return [{"date": r["date"], "title": r["title"], "qty": int(float(r["qty"])),
+             "revenue": float(r["revenue"]), "genre": r.get("genre") or ""} for r in rows]
+
+
+def _split_sale_rows(rows):
+    """Turn a DataFrame or iterable of sale rows into title/qty/date lists."""
+    if hasattr(rows, "columns") and hasattr(rows, "to_dict"):
+        cols = rows.to_dict("list")
+        titles = [str(t) for t in cols["title"]]
+        qtys = cols["qty"]
+        dates = cols.get("date") or [None] * len(titles)
+        dates = [None if (d is None or d != d or d == "") else str(d) for d in dates]
+        return titles, qtys, dates
+    titles, qtys, dates = [], [], []
+    for row in rows:
+        if isinstance(row, dict):
+            titles.append(row["title"])
+            qtys.append(row["qty"])
+            dates.append(row.get("date") or None)
+        else:
+            titles.append(row[0])
+            qtys.append(row[1])
+            dates.append(row[2] if len(row) > 2 else None)
+    return titles, qtys, dates
+
+
+_NO_LOCK = nullcontext()
+TITLE_LOCK_SHARDS = 64
+# copies left at or below which a title is due for reordering, unless
+# set_reorder_point gives it its own
+REORDER_POINT = 5
+# derived results (reports, chart inputs) kept per store; see _cached
+RESULT_CACHE_SIZE = 128
+
+
+class _RWLock:
+    """Many readers or one writer; a waiting writer holds off new readers."""
+
     def __init__(self):
-        self.inventory = []   
-        self.sales = []       
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
 
-    def find_book_index(self, title):
+    @contextmanager
+    def reading(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+# upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# methods timed once metrics are enabled
+INSTRUMENTED_METHODS = (
+    "find_book_index", "search_titles", "add_book", "update_book", "remove_book", "record_sale", "record_sales",
+    "top_sellers", "report_data", "generate_report", "total_revenue_numpy",
+    "monthly_revenue", "daily_revenue", "genre_revenue", "genre_units",
+    "load_inventory_csv", "load_sales_csv", "save_inventory_csv", "save_sales_csv",
+    "load_snapshot", "save_snapshot",
+    "plot_monthly_sales", "plot_genre_revenue_bar", "plot_revenue_pie_chart", "plot_correlation_heatmap",
+)
+
+
+class Metrics:
+    """Per-operation call counts, latency histograms, rows and bytes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def _op(self, op):
+        entry = self._ops.get(op)
+        if entry is None:
+            entry = self._ops[op] = {"calls": 0, "errors": 0, "seconds": 0.0,
+                                     "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                                     "rows": 0, "bytes_read": 0, "bytes_written": 0}
+        return entry
+
+    def observe(self, op, seconds, failed=False):
+        i = 0
+        while i < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[i]:
+            i += 1
+        with self._lock:
+            entry = self._op(op)
+            entry["calls"] += 1
+            entry["errors"] += failed
+            entry["seconds"] += seconds
+            entry["buckets"][i] += 1
+
+    def count(self, op, rows=0, bytes_read=0, bytes_written=0):
+        with self._lock:
+            entry = self._op(op)
+            entry["rows"] += rows
+            entry["bytes_read"] += bytes_read
+            entry["bytes_written"] += bytes_written
+
+    def timed(self, op, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            failed = True
+            try:
+                result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.observe(op, time.perf_counter() - t0, failed)
+        return wrapper
+
+    def snapshot(self):
+        """{op: {calls, errors, seconds, buckets {le: cumulative count}, rows, bytes_*}}."""
+        with self._lock:
+            ops = {op: dict(e, buckets=list(e["buckets"])) for op, e in self._ops.items()}
+        for entry in ops.values():
+            cumulative = list(itertools.accumulate(entry["buckets"]))
+            entry["buckets"] = dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], cumulative))
+        return ops
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix="bookstore"):
+        snap = self.snapshot()
+        lines = [f"# HELP {prefix}_op_seconds Time spent in Bookstore methods.",
+                 f"# TYPE {prefix}_op_seconds histogram"]
+        for op, e in sorted(snap.items()):
+            for le, n in e["buckets"].items():
+                lines.append(f'{prefix}_op_seconds_bucket{{op="{op}",le="{le}"}} {n}')
+            lines.append(f'{prefix}_op_seconds_sum{{op="{op}"}} {e["seconds"]}')
+            lines.append(f'{prefix}_op_seconds_count{{op="{op}"}} {e["calls"]}')
+        for name, key, help_text in (("op_errors_total", "errors", "Calls that raised."),
+                                     ("rows_total", "rows", "Rows loaded, saved or recorded."),
+                                     ("read_bytes_total", "bytes_read", "Bytes read from files."),
+                                     ("written_bytes_total", "bytes_written", "Bytes written to files.")):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for op, e in sorted(snap.items()):
+                if e[key] or key == "errors":
+                    lines.append(f'{prefix}_{name}{{op="{op}"}} {e[key]}')
+        return "\n".join(lines) + "\n"
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _exclusive(method):
+    """Run a method with the catalog write lock held (thread-safe stores)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._catalog_write():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _shared(method):
+    """Run a method with the catalog read lock held (thread-safe stores)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._catalog_read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _ledger_locked(method):
+    """Run a method with the sales ledger lock held (thread-safe stores)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._ledger():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _cached(method):
+    """Serve repeat calls from the store's LRU result cache; cached values are read-only."""
+    name = method.__name__
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())), self._cache_version())
+        with self._ledger():
+            results = self._results
+            if key in results:
+                results.move_to_end(key)
+                self._cache_hits += 1
+                return results[key]
+        # computed outside the cache lock; the key holds the version read
+        # before, so a change made meanwhile can't be cached under it
+        result = method(self, *args, **kwargs)
+        with self._ledger():
+            self._cache_misses += 1
+            results[key] = result
+            if len(results) > RESULT_CACHE_SIZE:
+                results.popitem(last=False)
+        return result
+    return wrapper
+
+
+class Bookstore:
+    def __init__(self, columnar=False, thread_safe=False, instrument=False):
+        """columnar selects the NumPy backends, thread_safe lets threads share the store
+        and instrument turns on metrics from the start."""
+        self.columnar = columnar
+        self._init_state(thread_safe)
+        self.inventory = ColumnarInventory() if columnar else []
+        self.sales = SalesLedger() if columnar else []
+        self._title_index = {}
+        self._removed_positions = []
+        self._duplicate_titles = False
+        self._stock_total = 0
+        self._day_cache = {}
+        self._reset_sales_totals()
+        self._dirty_titles = set()
+        # units journaled per title since the sales log last rotated
+        self._journal_sold = {}
+        self._compactor = None
+        if instrument:
+            self.enable_metrics()
+
+    def _init_state(self, thread_safe):
+        # what every backend keeps in memory however it stores books and
+        # sales; SQLiteBookstore calls this instead of __init__
+        self.thread_safe = thread_safe
+        if thread_safe:
+            self._catalog_lock = _RWLock()
+            self._title_locks = [threading.Lock() for _ in range(TITLE_LOCK_SHARDS)]
+            self._ledger_lock = threading.RLock()
+        self._version = 0
+        self._results = OrderedDict()
+        self._cache_hits = self._cache_misses = 0
+        self._search_index = None
+        self.reorder_point = REORDER_POINT
+        self._reorder_points = {}
+        # lazy min-heap of (qty, title key) for low_stock; see _stock_changed
+        self._stock_heap = None
+        self._low_stock_callbacks = []
+        self._low_titles = set()
+        self._sales_journal = None
+        self._inventory_journal = None
+        self._metrics = None
+
+    # ------------------------- METRICS ------------------------- #
+
+    def enable_metrics(self):
+        """Start timing the INSTRUMENTED_METHODS on this store."""
+        if self._metrics is not None:
+            return self._metrics
+        self._metrics = Metrics()
+        for name in INSTRUMENTED_METHODS:
+            setattr(self, name, self._metrics.timed(name, getattr(self, name)))
+        return self._metrics
+
+    def stats(self, format=None):
+        """Metrics collected so far, as a dict, or as text with
+        format="json" or format="prometheus".  Empty when disabled."""
+        metrics = self._metrics or Metrics()
+        if format == "json":
+            return metrics.to_json()
+        if format == "prometheus":
+            return metrics.to_prometheus()
+        if format is not None:
+            raise ValueError(f"Unknown stats format {format!r}; use 'json' or 'prometheus'.")
+        return metrics.snapshot()
+
+    # ------------------------- RESULT CACHE ------------------------- #
+
+    def _bump_version(self):
+        # every write path calls this once; results cached under older
+        # versions can never be hit again, so drop them now
+        with self._ledger():
+            self._version += 1
+            self._results.clear()
+
+    def _cache_version(self):
+        return self._version
+
+    def cache_info(self):
+        """Hits, misses and size of the result cache, plus the current version."""
+        with self._ledger():
+            return {"version": self._version, "hits": self._cache_hits, "misses": self._cache_misses,
+                    "size": len(self._results)}
+
+    def _catalog_read(self):
+        return self._catalog_lock.reading() if self.thread_safe else _NO_LOCK
+
+    def _catalog_write(self):
+        return self._catalog_lock.writing() if self.thread_safe else _NO_LOCK
+
+    def _title_lock(self, title):
+        if not self.thread_safe:
+            return _NO_LOCK
+        return self._title_locks[hash(title.lower()) % TITLE_LOCK_SHARDS]
+
+    def _ledger(self):
+        return self._ledger_lock if self.thread_safe else _NO_LOCK
+
+    def _reindex(self):
+        self._build_title_index()
+        # a search index already in use is rebuilt now so searches stay
+        # warm; otherwise it waits for build_index or the first search
+        if self._search_index is not None:
+            self._search_index = TitleSearchIndex(b["title"] for b in self._inventory_records())
+        self._stock_heap = None
+        self._refresh_low_titles()
+
+    def _build_title_index(self):
+        # case-folded title -> position in self.inventory as of this
+        # build; the first occurrence wins, same as the old linear scan.
+        # remove_book leaves the entries alone and records the removed
+        # position instead; see _position.
+        self._title_index = {}
         for i, b in enumerate(self.inventory):
-            if b["title"].lower() == title.lower():
-                return i
-        return -1
+            self._title_index.setdefault(b["title"].lower(), i)
+        self._removed_positions = []
+        self._duplicate_titles = len(self._title_index) < len(self.inventory)
+
+    def _position(self, key):
+        """Current position of the case-folded title key, or -1."""
+        pos = self._title_index.get(key, -1)
+        if pos > 0 and self._removed_positions:
+            pos -= bisect.bisect_left(self._removed_positions, pos)
+        return pos
+
+    def _set_inventory(self, records=(), cols=None):
+        """Replace the catalog with records, or with {field: column} cols."""
+        if cols is not None:
+            if self.columnar:
+                inventory = ColumnarInventory.from_columns(cols)
+            else:
+                inventory = _columns_to_records(cols, INVENTORY_COLUMNS)
+        elif self.columnar:
+            inventory = ColumnarInventory.from_records(records)
+        else:
+            inventory = list(records)
+        with self._ledger():
+            self.inventory = inventory
+            self._reindex()
+            self._stock_total = self._total_stock()
+            self._bump_version()
+
+    def _reorder_point(self, title):
+        return self._reorder_points.get(title.lower(), self.reorder_point)
+
+    def _stock_changed(self, title, qty):
+        # called with the ledger lock held whenever a title's stock is
+        # set.  The heap only ever gains entries; older ones for the same
+        # title go stale and low_stock skips them, and it is dropped for
+        # a rebuild once stale entries outnumber live ones.
+        heap = self._stock_heap
+        if heap is not None:
+            heapq.heappush(heap, (qty, title.lower()))
+            if len(heap) > 2 * len(self._title_index) + 64:
+                self._stock_heap = None
+        if self._low_stock_callbacks:
+            key = title.lower()
+            point = self._reorder_point(title)
+            if qty > point:
+                self._low_titles.discard(key)
+            elif key not in self._low_titles:
+                self._low_titles.add(key)
+                for callback in self._low_stock_callbacks:
+                    callback(title, qty, point)
+
+    def _refresh_low_titles(self):
+        # after a load: fire for every title that is low now and wasn't
+        # before, then forget the ones that have been restocked
+        if not self._low_stock_callbacks:
+            return
+        low = {}
+        for b in self._inventory_records():
+            point = self._reorder_point(b["title"])
+            if b["qty"] <= point:
+                low.setdefault(b["title"].lower(), (b["title"], b["qty"], point))
+        for key, (title, qty, point) in low.items():
+            if key not in self._low_titles:
+                for callback in self._low_stock_callbacks:
+                    callback(title, qty, point)
+        self._low_titles = set(low)
+
+    def _reset_sales_totals(self):
+        self._revenue_total = 0.0
+        self._units_sold = 0
+        self._title_units = {}
+        self._title_rank = {}
+        self._top_heap = []
+        # ordinal day per sale (-1 for unparseable dates), parallel to
+        # self.sales unless a columnar ledger already holds them (see
+        # _sale_day_array), plus revenue rolled up by day and by "YYYY-MM"
+        self._sale_days = None if self.columnar else array("i")
+        self._daily_revenue = {}
+        self._daily_units = {}
+        self._monthly_revenue = {}
+        # (sorted days, cumulative revenue, cumulative units), built on
+        # the first range query; see _date_index
+        self._day_index = None
+        self._genre_revenue = {}
+        self._genre_units = {}
+        self._bump_version()
+
+    def _set_sales(self, records=(), cols=None):
+        with self._ledger():
+            self.sales = SalesLedger() if self.columnar else []
+            self._reset_sales_totals()
+            self._extend_sales(records, cols)
+
+    def _extend_sales(self, records=(), cols=None):
+        """Append sale records, or {field: column} cols from the pandas loader."""
+        with self._ledger():
+            if cols is not None:
+                self._extend_sales_columns(cols)
+            for sale in records:
+                self._apply_sale(sale)
+                self.sales.append(sale)
+            self._bump_version()
+
+    def _extend_sales_columns(self, cols):
+        # what _apply_sale does row by row, done per column with
+        # bincount; only the list backend gets a dict per row
+        n = len(cols["title"])
+        if not n:
+            return
+        qty = np.asarray(cols["qty"], dtype=np.int64)
+        revenue = np.asarray(cols["revenue"], dtype=np.float64)
+        title_codes, titles = _encode_categories(cols["title"])
+        date_codes, dates = _encode_categories(cols["date"])
+        genre = np.asarray(cols["genre"], dtype=object)
+        blank = genre == ""
+        if blank.any():
+            # rows from before sales carried a genre: take it from the
+            # catalog if the book is still there
+            catalog = []
+            for t in titles:
+                idx = self._position(t.lower())
+                catalog.append(self.inventory[idx]["genre"] if idx != -1 else "")
+            genre = genre.copy()
+            genre[blank] = np.array(catalog, dtype=object)[title_codes[blank]]
+        genre_codes, genres = _encode_categories(genre)
+
+        self._revenue_total += float(revenue.sum())
+        self._units_sold += int(qty.sum())
+        units = np.bincount(title_codes, weights=qty, minlength=len(titles))
+        for t, u in zip(titles, units.tolist()):
+            self._title_rank.setdefault(t, len(self._title_rank))
+            self._title_units[t] = self._title_units.get(t, 0) + int(u)
+        self._top_heap = [(-u, self._title_rank[t], t) for t, u in self._title_units.items()]
+        heapq.heapify(self._top_heap)
+
+        days = np.array([self._parse_day(d)[0] for d in dates], dtype=np.int32)[date_codes]
+        if self._sale_days is not None:
+            self._sale_days.frombytes(days.tobytes())
+        valid = days >= 0
+        uniq, inverse = np.unique(days[valid], return_inverse=True)
+        day_revenue = dict(zip(uniq.tolist(), np.bincount(inverse, weights=revenue[valid]).tolist()))
+        day_units = np.bincount(inverse, weights=qty[valid], minlength=len(uniq))
+        for day, rev in day_revenue.items():
+            self._daily_revenue[day] = self._daily_revenue.get(day, 0.0) + rev
+        for day, u in zip(uniq.tolist(), day_units.tolist()):
+            self._daily_units[day] = self._daily_units.get(day, 0) + int(u)
+        for month, rev in _months_from_days(day_revenue).items():
+            self._monthly_revenue[month] = self._monthly_revenue.get(month, 0.0) + rev
+        # rebuilt on the next range query
+        self._day_index = None
+
+        genre_revenue = np.bincount(genre_codes, weights=revenue, minlength=len(genres))
+        genre_units = np.bincount(genre_codes, weights=qty, minlength=len(genres))
+        for g, rev, u in zip(genres, genre_revenue.tolist(), genre_units.tolist()):
+            self._genre_revenue[g] = self._genre_revenue.get(g, 0.0) + rev
+            self._genre_units[g] = self._genre_units.get(g, 0) + int(u)
+
+        if self.columnar:
+            self.sales.extend_columns(dates, date_codes, titles, title_codes, genres, genre_codes, qty, revenue)
+        else:
+            self.sales.extend({"date": d, "title": t, "qty": q, "revenue": r, "genre": g} for d, t, q, r, g in zip(
+                cols["date"].tolist(), cols["title"].tolist(), qty.tolist(), revenue.tolist(), genre.tolist()))
+
+    def _apply_sale(self, sale):
+        # keep the running totals behind generate_report up to date; runs
+        # before the sale is appended so a columnar ledger stores the
+        # backfilled genre
+        genre = sale.get("genre")
+        if not genre:
+            # rows from before sales carried a genre: take it from the
+            # catalog if the book is still there
+            idx = self._position(sale["title"].lower())
+            genre = sale["genre"] = self.inventory[idx]["genre"] if idx != -1 else ""
+        self._genre_revenue[genre] = self._genre_revenue.get(genre, 0.0) + sale["revenue"]
+        self._genre_units[genre] = self._genre_units.get(genre, 0) + sale["qty"]
+        self._revenue_total += sale["revenue"]
+        self._units_sold += sale["qty"]
+        title = sale["title"]
+        rank = self._title_rank.setdefault(title, len(self._title_rank))
+        units = self._title_units.get(title, 0) + sale["qty"]
+        self._title_units[title] = units
+        heapq.heappush(self._top_heap, (-units, rank, title))
+        if len(self._top_heap) > 2 * len(self._title_units) + 64:
+            self._top_heap = [(-u, self._title_rank[t], t) for t, u in self._title_units.items()]
+            heapq.heapify(self._top_heap)
+        day, month = self._parse_day(sale["date"])
+        if self._sale_days is not None:
+            self._sale_days.append(day)
+        if day >= 0:
+            self._daily_revenue[day] = self._daily_revenue.get(day, 0.0) + sale["revenue"]
+            self._daily_units[day] = self._daily_units.get(day, 0) + sale["qty"]
+            self._monthly_revenue[month] = self._monthly_revenue.get(month, 0.0) + sale["revenue"]
+            index = self._day_index
+            if index is not None:
+                days, cum_revenue, cum_units = index
+                if days and day == days[-1]:
+                    cum_revenue[-1] += sale["revenue"]
+                    cum_units[-1] += sale["qty"]
+                elif not days or day > days[-1]:
+                    days.append(day)
+                    cum_revenue.append(cum_revenue[-1] + sale["revenue"])
+                    cum_units.append(cum_units[-1] + sale["qty"])
+                else:
+                    # back-dated: every later prefix sum moves, so
+                    # rebuild on the next query instead of patching
+                    self._day_index = None
+
+    def _sale_day_array(self):
+        """Ordinal day per sale as an int32 array, -1 where unparseable."""
+        if self.columnar:
+            return self.sales.day
+        return np.frombuffer(self._sale_days, dtype=np.int32)
+
+    def _parse_day(self, text):
+        """(ordinal day, "YYYY-MM") for a sale date, or (-1, None)."""
+        hit = self._day_cache.get(text)
+        if hit is None:
+            d = _parse_date(text)
+            hit = self._day_cache[text] = (d.toordinal(), d.strftime("%Y-%m")) if d else (-1, None)
+        return hit
+
+    # ------------------------- DATE RANGES ------------------------- #
+
+    def _date_index(self):
+        """(sorted day ordinals, cumulative revenue, cumulative units), cumulatives from 0."""
+        if self._day_index is None:
+            days = sorted(self._daily_revenue)
+            cum_revenue = [0.0, *itertools.accumulate(self._daily_revenue[d] for d in days)]
+            cum_units = [0, *itertools.accumulate(self._daily_units[d] for d in days)]
+            self._day_index = (days, cum_revenue, cum_units)
+        return self._day_index
+
+    @_ledger_locked
+    def totals_between(self, start, end):
+        """(revenue, units) for sales dated start..end inclusive (dates or "YYYY-MM-DD")."""
+        days, cum_revenue, cum_units = self._date_index()
+        lo = bisect.bisect_left(days, _day_ordinal(start))
+        hi = bisect.bisect_right(days, _day_ordinal(end))
+        if hi <= lo:
+            return 0.0, 0
+        return cum_revenue[hi] - cum_revenue[lo], cum_units[hi] - cum_units[lo]
+
+    def revenue_between(self, start, end):
+        return self.totals_between(start, end)[0]
+
+    def units_between(self, start, end):
+        return self.totals_between(start, end)[1]
+
+    @_ledger_locked
+    def rolling(self, window=30, start=None, end=None):
+        """{"YYYY-MM-DD": (revenue, units)} over the trailing window days ending on
+        each day from start to end (default: first and last sale day)."""
+        if window < 1:
+            raise ValueError("window must be at least 1 day.")
+        days, cum_revenue, cum_units = self._date_index()
+        if not days:
+            return {}
+        first = days[0] if start is None else _day_ordinal(start)
+        last = days[-1] if end is None else _day_ordinal(end)
+        out = {}
+        for day in range(first, last + 1):
+            lo = bisect.bisect_right(days, day - window)
+            hi = bisect.bisect_right(days, day)
+            out[_date.fromordinal(day).isoformat()] = (cum_revenue[hi] - cum_revenue[lo], cum_units[hi] - cum_units[lo])
+        return out
+
+    @_cached
+    @_ledger_locked
+    def top_sellers(self, k=5):
+        # the heap holds stale (-units, rank, title) entries from earlier
+        # sales; skip them until k live ones have been seen, then put
+        # those back.  rank (first-seen order) breaks ties the way the
+        # old stable sort did.
+        found = []
+        seen = set()
+        heap = self._top_heap
+        while heap and len(found) < k:
+            entry = heapq.heappop(heap)
+            neg, _, title = entry
+            if title in seen or self._title_units.get(title) != -neg:
+                continue
+            seen.add(title)
+            found.append(entry)
+        for entry in found:
+            heapq.heappush(heap, entry)
+        return [(title, -neg) for neg, _, title in found]
+
+    def _inventory_records(self):
+        if self.columnar:
+            return self.inventory.to_records()
+        return self.inventory
+
+    def _total_stock(self):
+        if self.columnar:
+            return self.inventory.total_qty()
+        return sum(b["qty"] for b in self.inventory)
+
+    # ------------------------- JOURNAL ------------------------- #
+
+    def open_journal(self, inventory_file="inventory.csv", sales_file="sales.csv",
+                     sync_every=64, compact_after=100_000):
+        """Load state, then log later changes to ``.journal`` files next to the CSVs."""
+        self.load_inventory_csv(inventory_file)
+        self.load_sales_csv(sales_file)
+        inv_journal = Journal(inventory_file, ("op",) + INVENTORY_FIELDS, sync_every)
+        sales_journal = Journal(sales_file, SALES_FIELDS, sync_every)
 
+        # a compaction that died before swapping in the snapshots leaves
+        # its rotated logs behind: replay them and finish the job now
+        if inv_journal.old_is_pending():
+            # the sales snapshot is written after this one, so the old
+            # sales log is still pending too and its stock isn't taken off
+            self._replay_inventory(Journal.read(inv_journal.old_path),
+                                   _journal_sales(Journal.read(sales_journal.old_path)))
+            _write_atomic(inventory_file, lambda p: _write_csv_rows(p, INVENTORY_FIELDS, self._inventory_records()))
+        if sales_journal.old_is_pending():
+            self._extend_sales(_journal_sales(Journal.read(sales_journal.old_path)))
+            _write_atomic(sales_file, lambda p: _write_csv_rows(p, SALES_FIELDS, self.sales))
+        inv_journal.discard_old()
+        sales_journal.discard_old()
+
+        sales = _journal_sales(Journal.read(sales_journal.path))
+        self._replay_inventory(Journal.read(inv_journal.path), sales)
+        self._extend_sales(sales)
+        self._journal_sold = {}
+        for sale in sales:
+            key = sale["title"].lower()
+            self._journal_sold[key] = self._journal_sold.get(key, 0) + sale["qty"]
+        self._inventory_journal = inv_journal
+        self._sales_journal = sales_journal
+        self._compact_after = compact_after
+        self._dirty_titles = set()
+        print(f"Journal open ({inv_journal.rows} inventory, {sales_journal.rows} sales entries replayed)")
+
+    def _replay_inventory(self, rows, sales=()):
+        # put rows carry a title's stock as of the start of their sales
+        # log (see _flush_dirty_inventory), so every sale in that log is
+        # taken off afterwards, whether or not a later put was flushed
+        if not rows and not sales:
+            return
+        books = {b["title"].lower(): dict(b) for b in self._inventory_records()}
+        for row in rows:
+            key = row["title"].lower()
+            if row["op"] == "del":
+                books.pop(key, None)
+            else:
+                books[key] = {"title": row["title"], "author": row["author"], "genre": row["genre"],
+                              "price": float(row["price"]), "qty": int(float(row["qty"]))}
+        for sale in sales:
+            book = books.get(sale["title"].lower())
+            if book is not None:
+                book["qty"] -= sale["qty"]
+        self._set_inventory(books.values())
+
+    def _mark_dirty(self, title):
+        if self._inventory_journal is not None:
+            with self._ledger():
+                self._dirty_titles.add(title.lower())
+
+    def _journal_sale(self, sale):
+        journal = self._sales_journal
+        if journal is None:
+            return
+        journal.append(sale)
+        key = sale["title"].lower()
+        self._journal_sold[key] = self._journal_sold.get(key, 0) + sale["qty"]
+
+    def _maybe_compact(self):
+        # only between sales: a batch whose stock is already taken but
+        # whose rows are only partly journaled when the logs rotate would
+        # be taken off twice on replay
+        journal = self._sales_journal
+        busy = self._compactor is not None and self._compactor.is_alive()
+        if journal is not None and journal.rows >= self._compact_after and not busy:
+            # the caller already holds the catalog lock
+            self._compact(background=True)
+
+    @_ledger_locked
+    def _flush_dirty_inventory(self):
+        for key in sorted(self._dirty_titles):
+            idx = self._position(key)
+            if idx == -1:
+                self._inventory_journal.append({"op": "del", "title": key})
+            else:
+                # stock as of the start of the sales log, which replay
+                # then takes that log's sales off; see _replay_inventory
+                row = self.inventory[idx].to_dict() if self.columnar else self.inventory[idx]
+                self._inventory_journal.append(dict(row, op="put", qty=row["qty"] + self._journal_sold.get(key, 0)))
+        self._inventory_journal.sync()
+        written = len(self._dirty_titles)
+        self._dirty_titles = set()
+        return written
+
+    @_shared
+    def compact(self, background=False):
+        """Fold the journals into fresh snapshot CSVs."""
+        self._compact(background)
+
+    @_ledger_locked
+    def _compact(self, background):
+        if self._sales_journal is None:
+            raise ValueError("Journal is not open.")
+        self.wait_for_compaction()
+        self._flush_dirty_inventory()
+        inv_journal, sales_journal = self._inventory_journal, self._sales_journal
+        inv_journal.rotate()
+        sales_journal.rotate()
+        self._journal_sold = {}
+        # sales dicts are never mutated after they are recorded, so a
+        # shallow copy is a stable view; inventory rows are copied
+        books = self.inventory.to_records() if self.columnar else [dict(b) for b in self.inventory]
+        sales = list(self.sales)
+
+        def run():
+            _write_atomic(inv_journal.snapshot, lambda p: _write_csv_rows(p, INVENTORY_FIELDS, books))
+            _write_atomic(sales_journal.snapshot, lambda p: _write_csv_rows(p, SALES_FIELDS, sales))
+            inv_journal.discard_old()
+            sales_journal.discard_old()
+
+        if background:
+            self._compactor = threading.Thread(target=run, name="bookstore-compactor")
+            self._compactor.start()
+        else:
+            run()
+            print(f"Compacted journals into {inv_journal.snapshot} and {sales_journal.snapshot}")
+
+    def wait_for_compaction(self):
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    @_exclusive
+    def close_journal(self):
+        if self._sales_journal is None:
+            return
+        self.wait_for_compaction()
+        self._flush_dirty_inventory()
+        self._inventory_journal.close()
+        self._sales_journal.close()
+        self._inventory_journal = self._sales_journal = None
+
+    # ------------------------- SNAPSHOT ------------------------- #
+
+    def _sales_totals_state(self):
+        return {
+            "revenue_total": self._revenue_total,
+            "units_sold": self._units_sold,
+        }
+
+    def _restore_sales_totals(self, meta, titles, genres, a):
+        # titles are in first-seen order, which is exactly _title_rank
+        self._revenue_total = meta["revenue_total"]
+        self._units_sold = meta["units_sold"]
+        self._title_rank = {t: i for i, t in enumerate(titles)}
+        self._title_units = dict(zip(titles, a["title_units"].tolist()))
+        self._top_heap = [(-u, self._title_rank[t], t) for t, u in self._title_units.items()]
+        heapq.heapify(self._top_heap)
+
+        days = np.asarray(a["sale_day"])
+        if not self.columnar:
+            self._sale_days = array("i", days.tobytes())
+        valid = days >= 0
+        uniq, inverse = np.unique(days[valid], return_inverse=True)
+        totals = np.bincount(inverse, weights=np.asarray(a["sale_revenue"])[valid], minlength=len(uniq))
+        self._daily_revenue = dict(zip(uniq.tolist(), totals.tolist()))
+        units = np.bincount(inverse, weights=np.asarray(a["sale_qty"])[valid], minlength=len(uniq))
+        self._daily_units = dict(zip(uniq.tolist(), (int(u) for u in units)))
+        self._monthly_revenue = _months_from_days(self._daily_revenue)
+
+        codes = np.asarray(a["sale_genre"])
+        revenue = np.bincount(codes, weights=np.asarray(a["sale_revenue"]), minlength=len(genres))
+        units = np.bincount(codes, weights=np.asarray(a["sale_qty"]), minlength=len(genres))
+        self._genre_revenue = dict(zip(genres, revenue.tolist()))
+        self._genre_units = dict(zip(genres, (int(u) for u in units)))
+        self._bump_version()
+
+    @_exclusive
+    def save_snapshot(self, dirname="bookstore.snapshot"):
+        """Write inventory, sales and running totals as raw .npy columns under dirname."""
+        if not np:
+            raise RuntimeError("NumPy is required for snapshots.")
+        tmp = dirname + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        if self.columnar:
+            cols = self.inventory.to_columns()
+        else:
+            cols = {f: [b[f] for b in self.inventory] for f in INVENTORY_FIELDS}
+        author_codes, authors = _encode_categories(cols["author"])
+        genre_codes, genres = _encode_categories(cols["genre"])
+        sale_titles = list(self._title_rank)
+        if self.columnar:
+            # the ledger's title table is in first-seen order too, so its
+            # codes are already the ranks
+            ledger = self.sales
+            odd_dates = sorted(ledger.odd_dates.items())
+            sale_title_codes = ledger.title_codes
+            sale_genre_codes, sale_genres = ledger.genre_codes, ledger.genres
+            sale_qty, sale_revenue = ledger.qty.astype(np.int64), ledger.revenue_cents / 100
+            sale_cents = ledger.revenue_cents
+        else:
+            rank = self._title_rank
+            n_sales = len(self.sales)
+            # only dates that don't round-trip through sale_day are kept as text
+            date_codes, dates = _encode_categories([s["date"] for s in self.sales])
+            parsed = [_parse_date(t) for t in dates]
+            odd = np.array([d is None or d.isoformat() != t for t, d in zip(dates, parsed)], dtype=bool)
+            odd_dates = [(i, dates[date_codes[i]]) for i in np.flatnonzero(odd[date_codes]).tolist()]
+            sale_title_codes = np.fromiter((rank[s["title"]] for s in self.sales), dtype=np.int32, count=n_sales)
+            sale_genre_codes, sale_genres = _encode_categories([s["genre"] for s in self.sales])
+            sale_qty = np.fromiter((s["qty"] for s in self.sales), dtype=np.int64, count=n_sales)
+            sale_revenue = np.fromiter((s["revenue"] for s in self.sales), dtype=np.float64, count=n_sales)
+            sale_cents = np.rint(sale_revenue * 100).astype(np.int64)
+        arrays = {
+            "inv_title": _pack_strings(cols["title"]),
+            "inv_author": author_codes,
+            "inv_authors": _pack_strings(authors),
+            "inv_genre": genre_codes,
+            "inv_genres": _pack_strings(genres),
+            "inv_price": np.asarray(cols["price"], dtype=np.float64),
+            "inv_qty": np.asarray(cols["qty"], dtype=np.int64),
+            "sale_odd_rows": np.asarray([i for i, _ in odd_dates], dtype=np.int64),
+            "sale_odd_dates": _pack_strings([t for _, t in odd_dates]),
+            "sale_title": sale_title_codes,
+            "sale_titles": _pack_strings(sale_titles),
+            "sale_qty": sale_qty,
+            "sale_revenue": sale_revenue,
+            "sale_cents": sale_cents,
+            "title_units": np.asarray([self._title_units[t] for t in sale_titles], dtype=np.int64),
+            "sale_day": self._sale_day_array(),
+            "sale_genre": sale_genre_codes,
+            "sale_genres": _pack_strings(sale_genres),
+        }
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, name + ".npy"), arr)
+        meta = {"version": SNAPSHOT_VERSION, "books": len(self.inventory), "sales": len(self.sales),
+                "authors": len(authors), "genres": len(genres), "sale_titles": len(sale_titles),
+                "sale_genres": len(sale_genres), "odd_dates": len(odd_dates)}
+        meta.update(self._sales_totals_state())
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        # swap directories so a crash never leaves a half-written snapshot
+        # under the real name; load_snapshot falls back to .prev
+        prev = dirname + ".prev"
+        shutil.rmtree(prev, ignore_errors=True)
+        if os.path.exists(dirname):
+            os.replace(dirname, prev)
+        os.replace(tmp, dirname)
+        shutil.rmtree(prev, ignore_errors=True)
+        if self._metrics is not None:
+            self._metrics.count("save_snapshot", rows=len(self.inventory) + len(self.sales),
+                                bytes_written=sum(_file_size(os.path.join(dirname, f)) for f in os.listdir(dirname)))
+        print(f"Saved snapshot to {dirname}")
+
+    @_exclusive
+    def load_snapshot(self, dirname="bookstore.snapshot"):
+        if not np:
+            raise RuntimeError("NumPy is required for snapshots.")
+        if not os.path.exists(dirname) and os.path.exists(dirname + ".prev"):
+            dirname = dirname + ".prev"
+        with open(os.path.join(dirname, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{dirname} is a version {meta.get('version')} snapshot; re-save it from CSV.")
+        a = {name[:-4]: np.load(os.path.join(dirname, name), mmap_mode="r")
+             for name in os.listdir(dirname) if name.endswith(".npy")}
+        n, m = meta["books"], meta["sales"]
+
+        authors = _unpack_strings(a["inv_authors"], meta["authors"])
+        genres = _unpack_strings(a["inv_genres"], meta["genres"])
+        cols = {
+            "title": _unpack_strings(a["inv_title"], n),
+            "author": [authors[c] for c in a["inv_author"].tolist()],
+            "genre": [genres[c] for c in a["inv_genre"].tolist()],
+            "price": np.array(a["inv_price"]),
+            "qty": np.array(a["inv_qty"]),
+        }
+        self._set_inventory(cols=cols)
+
+        sale_titles = _unpack_strings(a["sale_titles"], meta["sale_titles"])
+        sale_genres = _unpack_strings(a["sale_genres"], meta["sale_genres"])
+        odd_dates = dict(zip(a["sale_odd_rows"].tolist(), _unpack_strings(a["sale_odd_dates"], meta["odd_dates"])))
+        if self.columnar:
+            self.sales = SalesLedger.from_codes(a["sale_day"], odd_dates, a["sale_title"], sale_titles,
+                                                a["sale_genre"], sale_genres, a["sale_qty"], a["sale_cents"])
+        else:
+            # canonical dates are rebuilt from sale_day, once per distinct day
+            days = a["sale_day"].tolist()
+            text = {d: _date.fromordinal(d).isoformat() for d in set(days) if d >= 0}
+            dates = [text.get(d) for d in days]
+            for i, t in odd_dates.items():
+                dates[i] = t
+            self.sales = [
+                {"date": d, "title": sale_titles[t], "qty": q, "revenue": r, "genre": sale_genres[g]}
+                for d, t, q, r, g in zip(dates, a["sale_title"].tolist(), a["sale_qty"].tolist(),
+                                         a["sale_revenue"].tolist(), a["sale_genre"].tolist())
+            ]
+        self._restore_sales_totals(meta, sale_titles, sale_genres, a)
+        if self._metrics is not None:
+            self._metrics.count("load_snapshot", rows=n + m,
+                                bytes_read=sum(_file_size(os.path.join(dirname, f)) for f in os.listdir(dirname)))
+        print(f"Loaded snapshot from {dirname} ({n} books, {m} sales)")
+
+    def find_book_index(self, title):
+        return self._position(title.lower())
+
+    @_exclusive
+    def build_index(self):
+        """Build the title search index now instead of on the first search."""
+        self._search_index = TitleSearchIndex(b["title"] for b in self._inventory_records())
+
+    def search_titles(self, query, limit=10):
+        """Up to limit catalog titles matching query: prefix matches first
+        (case-insensitive, alphabetical), then typo-tolerant ones, best first."""
+        with self._catalog_read():
+            if self._search_index is not None:
+                return self._search_index.search(query, limit)
+        self.build_index()
+        return self.search_titles(query, limit)
+
+    @_shared
+    def low_stock(self, threshold=None, limit=10):
+        """Up to limit (title, qty) pairs at or below threshold (default: each title's
+        reorder point), fewest copies first."""
+        with self._ledger():
+            if self._stock_heap is None:
+                if self.columnar:
+                    stock = zip(self.inventory.qty.tolist(), self.inventory.titles)
+                else:
+                    stock = ((b["qty"], b["title"]) for b in self.inventory)
+                self._stock_heap = [(q, t.lower()) for q, t in stock]
+                heapq.heapify(self._stock_heap)
+            heap = self._stock_heap
+            if threshold is None:
+                bound = max([self.reorder_point, *self._reorder_points.values()])
+            else:
+                bound = threshold
+            found, live, seen = [], [], set()
+            while heap and heap[0][0] <= bound and len(found) < limit:
+                entry = heapq.heappop(heap)
+                qty, key = entry
+                idx = self._position(key)
+                if key in seen or idx == -1 or self.inventory[idx]["qty"] != qty:
+                    continue
+                seen.add(key)
+                live.append(entry)
+                title = self.inventory[idx]["title"]
+                if qty <= (bound if threshold is not None else self._reorder_point(title)):
+                    found.append((title, qty))
+            for entry in live:
+                heapq.heappush(heap, entry)
+            return found
+
+    def set_reorder_point(self, title, point):
+        """Hold title to its own reorder point instead of self.reorder_point."""
+        point = positive_int(point, "Reorder point")
+        with self._catalog_read():
+            idx = self.find_book_index(title)
+            if idx == -1:
+                raise ValueError("Book not found.")
+            book = self.inventory[idx]
+            with self._ledger():
+                self._reorder_points[book["title"].lower()] = point
+                self._stock_changed(book["title"], int(book["qty"]))
+
+    @_exclusive
+    def on_low_stock(self, callback):
+        """Call callback(title, qty, reorder_point) each time a title drops to its reorder
+        point; it runs under the store's locks, so it mustn't call back in."""
+        if not self._low_stock_callbacks:
+            self._low_titles = {b["title"].lower() for b in self._inventory_records()
+                                if b["qty"] <= self._reorder_point(b["title"])}
+        self._low_stock_callbacks.append(callback)
+        return callback
+
+    @_exclusive
     def add_book(self, title, author, genre, price, qty):
         if self.find_book_index(title) != -1:
             raise ValueError("Book already exists. Use update_book to change quantity/price.")
         price = positive_float(price, "Price")
         qty = positive_int(qty, "Quantity")
         book = {"title": title, "author": author, "genre": genre, "price": price, "qty": qty}
-        self.inventory.append(book)
+        # in the index's own numbering, which still counts removed rows
+        self._title_index[title.lower()] = len(self.inventory) + len(self._removed_positions)
+        if self._search_index is not None:
+            self._search_index.add(title)
+        with self._ledger():
+            self.inventory.append(book)
+            self._stock_total += qty
+            self._stock_changed(title, qty)
+        self._bump_version()
+        self._mark_dirty(title)
         print(f"Added '{title}' (qty={qty}, price={price})")
 
+    @_exclusive
     def update_book(self, title, price=None, qty=None):
         idx = self.find_book_index(title)
         if idx == -1:
@@ -59,16 +1811,39 @@ class Bookstore:
         if price is not None:
             self.inventory[idx]["price"] = positive_float(price, "Price")
         if qty is not None:
-            self.inventory[idx]["qty"] = positive_int(qty, "Quantity")
+            qty = positive_int(qty, "Quantity")
+            with self._ledger():
+                self._stock_total += qty - self.inventory[idx]["qty"]
+                self.inventory[idx]["qty"] = qty
+                self._stock_changed(self.inventory[idx]["title"], qty)
+        self._bump_version()
+        self._mark_dirty(title)
         print(f"Updated '{title}' -> price={self.inventory[idx]['price']}, qty={self.inventory[idx]['qty']}")
 
+    @_exclusive
     def remove_book(self, title):
         idx = self.find_book_index(title)
         if idx == -1:
             raise ValueError("Book not found.")
-        removed = self.inventory.pop(idx)
+        with self._ledger():
+            removed = self.inventory.pop(idx)
+            self._stock_total -= removed["qty"]
+        self._mark_dirty(removed["title"])
+        pos = self._title_index.pop(removed["title"].lower())
+        if self._duplicate_titles or len(self._removed_positions) > 64 + len(self.inventory) // 16:
+            # a later copy of the title has to take over, or enough
+            # removals have piled up to make lookups slower than a rebuild
+            self._build_title_index()
+        else:
+            bisect.insort(self._removed_positions, pos)
+        if removed["title"].lower() not in self._title_index:
+            if self._search_index is not None:
+                self._search_index.remove(removed["title"])
+            self._low_titles.discard(removed["title"].lower())
+        self._bump_version()
         print(f"Removed '{removed['title']}' from inventory.")
 
+    @_shared
     def list_inventory(self):
         if not self.inventory:
             print("Inventory is empty.")
@@ -81,231 +1856,669 @@ class Bookstore:
         print()
 
     def record_sale(self, title, qty, date=None):
-        idx = self.find_book_index(title)
-        if idx == -1:
-            raise ValueError("Book not in inventory.")
-        qty = positive_int(qty, "Quantity sold")
-        if qty > self.inventory[idx]["qty"]:
-            raise ValueError("Not enough copies in stock.")
-        price = self.inventory[idx]["price"]
-        revenue = price * qty
-        self.inventory[idx]["qty"] -= qty
-        if date is None:
-            date = datetime.now().strftime("%Y-%m-%d")
-        sale = {"date": date, "title": self.inventory[idx]["title"], "qty": qty, "revenue": revenue}
-        self.sales.append(sale)
+        with self._catalog_read():
+            idx = self.find_book_index(title)
+            if idx == -1:
+                raise ValueError("Book not in inventory.")
+            qty = positive_int(qty, "Quantity sold")
+            book = self.inventory[idx]
+            revenue = book["price"] * qty
+            if date is None:
+                date = datetime.now().strftime("%Y-%m-%d")
+            sale = {"date": date, "title": book["title"], "qty": qty, "revenue": revenue, "genre": book["genre"]}
+            with self._title_lock(title):
+                if qty > book["qty"]:
+                    raise ValueError("Not enough copies in stock.")
+                # the decrement and the journal row go together under the
+                # ledger lock, so a compaction can't snapshot one without
+                # the other
+                with self._ledger():
+                    book["qty"] -= qty
+                    self._stock_total -= qty
+                    self._stock_changed(book["title"], int(book["qty"]))
+                    self._apply_sale(sale)
+                    self.sales.append(sale)
+                    self._bump_version()
+                    self._mark_dirty(title)
+                    self._journal_sale(sale)
+                    self._maybe_compact()
         print(f"Recorded sale: {qty} x '{title}' (revenue {revenue:.2f})")
 
-    def generate_report(self):
-        total_stock = sum(b["qty"] for b in self.inventory)
-        total_books = len(self.inventory)
-        total_revenue = sum(s["revenue"] for s in self.sales)
-        total_sold = sum(s["qty"] for s in self.sales)
+    @_exclusive
+    def record_sales(self, rows):
+        """Record a batch of sales (DataFrame, dicts or (title, qty[, date]) tuples), all
+        or nothing; returns the number recorded."""
+        titles, qtys, dates = _split_sale_rows(rows)
+        if not titles:
+            return 0
+
+        idxs = [self._position(t.lower()) for t in titles]
+        missing = [t for t, i in zip(titles, idxs) if i == -1]
+        if missing:
+            raise ValueError(f"Book not in inventory: {missing[0]!r} ({len(missing)} unknown row(s)).")
+
+        # reports take only the ledger lock, so it is held from the first
+        # stock change to the last running total
+        with self._ledger():
+            if np:
+                try:
+                    q = np.asarray(qtys, dtype=float)
+                except (TypeError, ValueError):
+                    raise ValueError("Quantity sold must be an integer.")
+                if not np.isfinite(q).all():
+                    raise ValueError("Quantity sold must be an integer.")
+                if (q < 0).any():
+                    raise ValueError("Quantity sold must be non-negative.")
+                q = q.astype(np.int64)
+                idx = np.asarray(idxs, dtype=np.int64)
+                touched, inverse = np.unique(idx, return_inverse=True)
+                demand = np.bincount(inverse, weights=q).astype(np.int64)
+                if self.columnar:
+                    stock = self.inventory.qty[touched]
+                else:
+                    stock = np.array([self.inventory[i]["qty"] for i in touched], dtype=np.int64)
+                short = demand > stock
+                if short.any():
+                    title = self.inventory[int(touched[short.argmax()])]["title"]
+                    raise ValueError(f"Not enough copies in stock for {title!r}.")
+                qtys = q.tolist()
+                changed = touched.tolist()
+                if self.columnar:
+                    self.inventory.qty[touched] -= demand
+                else:
+                    for i, d in zip(touched.tolist(), demand.tolist()):
+                        self.inventory[i]["qty"] -= d
+                total_units = int(demand.sum())
+            else:
+                qtys = [positive_int(x, "Quantity sold") for x in qtys]
+                demand = {}
+                for i, x in zip(idxs, qtys):
+                    demand[i] = demand.get(i, 0) + x
+                for i, d in demand.items():
+                    if d > self.inventory[i]["qty"]:
+                        raise ValueError(f"Not enough copies in stock for {self.inventory[i]['title']!r}.")
+                for i, d in demand.items():
+                    self.inventory[i]["qty"] -= d
+                changed = list(demand)
+                total_units = sum(demand.values())
+
+            self._stock_total -= total_units
+            today = datetime.now().strftime("%Y-%m-%d")
+            inv = self.inventory
+            revenue = 0.0
+            for i, x, d in zip(idxs, qtys, dates):
+                book = inv[i]
+                sale = {"date": d or today, "title": book["title"], "qty": x, "revenue": book["price"] * x,
+                        "genre": book["genre"]}
+                self._apply_sale(sale)
+                self.sales.append(sale)
+                self._mark_dirty(book["title"])
+                self._journal_sale(sale)
+                revenue += sale["revenue"]
+            self._maybe_compact()
+            if self._stock_heap is not None or self._low_stock_callbacks:
+                for i in changed:
+                    book = inv[i]
+                    self._stock_changed(book["title"], int(book["qty"]))
+            self._bump_version()
+        if self._metrics is not None:
+            self._metrics.count("record_sales", rows=len(titles))
+        print(f"Recorded {len(titles)} sales ({total_units} copies, revenue {revenue:.2f})")
+        return len(titles)
+
+    @_cached
+    @_ledger_locked
+    def report_data(self, top=5):
+        if self.columnar:
+            # exact integer sums over the ledger columns, no float drift
+            sold, revenue = self.sales.total_units(), self.sales.total_revenue()
+        else:
+            sold, revenue = self._units_sold, self._revenue_total
+        return {
+            "total_books": len(self.inventory),
+            "total_stock": self._stock_total,
+            "total_sold": sold,
+            "total_revenue": revenue,
+            "top_sellers": self.top_sellers(top) if self.sales else [],
+        }
+
+    def generate_report(self, top=5):
+        report = self.report_data(top)
         print("\n==== Simple Report ====")
-        print(f"Books in catalog: {total_books}")
-        print(f"Total units in stock: {total_stock}")
-        print(f"Total units sold: {total_sold}")
-        print(f"Total revenue: {total_revenue:.2f}")
+        print(f"Books in catalog: {report['total_books']}")
+        print(f"Total units in stock: {report['total_stock']}")
+        print(f"Total units sold: {report['total_sold']}")
+        print(f"Total revenue: {report['total_revenue']:.2f}")
         
-        if self.sales:
-            counts = {}
-            for s in self.sales:
-                counts[s["title"]] = counts.get(s["title"], 0) + s["qty"]
-            top = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        if report["top_sellers"]:
             print("Top sellers:")
-            for t, q in top:
+            for t, q in report["top_sellers"]:
                 print(f" - {t}: {q} copies")
         print("=======================\n")
 
+    def reorder_report(self, limit=20):
+        low = self.low_stock(limit=limit)
+        print("\n==== Reorder Report ====")
+        if not low:
+            print("Nothing at or below its reorder point.")
+        for t, q in low:
+            print(f" - {t}: {q} left (reorder at {self._reorder_point(t)})")
+        print("========================\n")
+        return low
+
     def total_revenue_numpy(self):
-        if np is None:
+        if not np:
             print("NumPy not installed; skip this metric.")
             return None
-        revenues = np.array([s["revenue"] for s in self.sales], dtype=float)
-        total = float(np.sum(revenues)) if revenues.size else 0.0
+        total = self._sum_revenue()
         print(f"(NumPy) Total revenue = {total:.2f}")
         return total
 
+    @_cached
+    @_ledger_locked
+    def _sum_revenue(self):
+        if self.columnar:
+            return self.sales.total_revenue()
+        revenues = np.array([s["revenue"] for s in self.sales], dtype=float)
+        return float(np.sum(revenues)) if revenues.size else 0.0
+
+    @_exclusive
     def save_inventory_csv(self, filename="inventory.csv"):
-        if pd is not None:
-            df = pd.DataFrame(self.inventory)
-            df.to_csv(filename, index=False)
+        journal = self._inventory_journal
+        if journal is not None and os.path.abspath(filename) == journal.snapshot:
+            written = self._flush_dirty_inventory()
+            if self._metrics is not None:
+                self._metrics.count("save_inventory_csv", rows=written)
+            print(f"Saved {written} changed inventory rows to {journal.path}")
+            return
+        if _use_pandas():
+            if self.columnar:
+                df = pd.DataFrame(self.inventory.to_columns())
+            else:
+                df = pd.DataFrame(self.inventory)
+            _write_atomic(filename, lambda p: df.to_csv(p, index=False))
         else:
-            with open(filename, "w", newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=["title","author","genre","price","qty"])
-                writer.writeheader()
-                writer.writerows(self.inventory)
+            _write_atomic(filename, lambda p: _write_csv_rows(p, INVENTORY_FIELDS, self._inventory_records()))
+        if self._metrics is not None:
+            self._metrics.count("save_inventory_csv", rows=len(self.inventory), bytes_written=_file_size(filename))
         print(f"Saved inventory to {filename}")
 
+    @_exclusive
     def save_sales_csv(self, filename="sales.csv"):
-        if pd is not None:
-            df = pd.DataFrame(self.sales)
-            df.to_csv(filename, index=False)
+        journal = self._sales_journal
+        if journal is not None and os.path.abspath(filename) == journal.snapshot:
+            journal.sync()
+            print(f"Sales journal {journal.path} synced ({journal.rows} entries since last compaction)")
+            return
+        if _use_pandas():
+            df = pd.DataFrame(self.sales.to_columns() if self.columnar else self.sales)
+            _write_atomic(filename, lambda p: df.to_csv(p, index=False))
         else:
-            with open(filename, "w", newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=["date","title","qty","revenue"])
-                writer.writeheader()
-                writer.writerows(self.sales)
+            _write_atomic(filename, lambda p: _write_csv_rows(p, SALES_FIELDS, self.sales))
+        if self._metrics is not None:
+            self._metrics.count("save_sales_csv", rows=len(self.sales), bytes_written=_file_size(filename))
         print(f"Saved sales to {filename}")
 
+    @_exclusive
     def load_inventory_csv(self, filename="inventory.csv"):
         if not os.path.exists(filename):
             print(f"No {filename} found; starting with empty inventory.")
             return
-        if pd is not None:
-            df = pd.read_csv(filename)
-            self.inventory = []
-            for _, row in df.iterrows():
-                self.inventory.append({
-                    "title": str(row.get("title", row.get("Title", ""))),
-                    "author": str(row.get("author", row.get("Author", ""))),
-                    "genre": str(row.get("genre", row.get("Genre", ""))),
-                    "price": float(row.get("price", row.get("Price", 0.0))),
-                    "qty": int(row.get("qty", row.get("Quantity", 0)))
-                })
+        if _use_pandas(filename):
+            cols = _read_csv_columns(filename, INVENTORY_COLUMNS)
+            self._set_inventory(cols=cols)
         else:
             with open(filename, newline='', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
-                self.inventory = []
+                names = _resolve_columns(reader.fieldnames or [], INVENTORY_COLUMNS)
+                records = []
                 for row in reader:
-                    self.inventory.append({
-                        "title": row.get("title",""),
-                        "author": row.get("author",""),
-                        "genre": row.get("genre",""),
-                        "price": float(row.get("price",0.0)),
-                        "qty": int(float(row.get("qty",0)))
+                    records.append({
+                        "title": _csv_field(row, names["title"], ""),
+                        "author": _csv_field(row, names["author"], ""),
+                        "genre": _csv_field(row, names["genre"], ""),
+                        "price": float(_csv_field(row, names["price"], 0.0)),
+                        "qty": int(float(_csv_field(row, names["qty"], 0)))
                     })
+            self._set_inventory(records)
+        if self._metrics is not None:
+            self._metrics.count("load_inventory_csv", rows=len(self.inventory), bytes_read=_file_size(filename))
         print(f"Loaded inventory from {filename}")
 
-    def load_sales_csv(self, filename="sales.csv"):
+    @_exclusive
+    def load_sales_csv(self, filename="sales.csv", chunksize=None):
+        """Load sales history, replacing what is in memory; chunksize streams it (pandas only)."""
         if not os.path.exists(filename):
             print(f"No {filename} found; starting with empty sales history.")
             return
-        if pd is not None:
-            df = pd.read_csv(filename)
-            self.sales = []
-            for _, row in df.iterrows():
-                self.sales.append({
-                    "date": str(row.get("date", row.get("Date", ""))),
-                    "title": str(row.get("title", row.get("Title", ""))),
-                    "qty": int(row.get("qty", row.get("Quantity Sold", 0))),
-                    "revenue": float(row.get("revenue", row.get("Total Revenue", 0.0)))
-                })
+        if _use_pandas(filename) or (chunksize and pd):
+            if chunksize:
+                self._set_sales()
+                for cols in _read_csv_columns(filename, SALES_COLUMNS, chunksize=chunksize):
+                    self._extend_sales(cols=cols)
+            else:
+                self._set_sales(cols=_read_csv_columns(filename, SALES_COLUMNS))
         else:
             with open(filename, newline='', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
-                self.sales = []
+                names = _resolve_columns(reader.fieldnames or [], SALES_COLUMNS)
+                records = []
                 for row in reader:
-                    self.sales.append({
-                        "date": row.get("date",""),
-                        "title": row.get("title",""),
-                        "qty": int(float(row.get("qty",0))),
-                        "revenue": float(row.get("revenue",0.0))
+                    records.append({
+                        "date": _csv_field(row, names["date"], ""),
+                        "title": _csv_field(row, names["title"], ""),
+                        "qty": int(float(_csv_field(row, names["qty"], 0))),
+                        "revenue": float(_csv_field(row, names["revenue"], 0.0)),
+                        "genre": _csv_field(row, names["genre"], "")
                     })
+            self._set_sales(records)
+        if self._metrics is not None:
+            self._metrics.count("load_sales_csv", rows=len(self.sales), bytes_read=_file_size(filename))
         print(f"Loaded sales from {filename}")
 
-    def plot_monthly_sales(self, filename="monthly_sales.png"):
+    @_ledger_locked
+    def monthly_revenue(self):
+        """{"YYYY-MM": revenue} over all sales with a parseable date."""
+        return dict(self._monthly_revenue)
+
+    @_ledger_locked
+    def genre_revenue(self):
+        """{genre: revenue}, with "" for sales whose genre is unknown."""
+        return dict(self._genre_revenue)
+
+    @_ledger_locked
+    def genre_units(self):
+        return dict(self._genre_units)
+
+    @_ledger_locked
+    def daily_revenue(self):
+        """{"YYYY-MM-DD": revenue} over all sales with a parseable date."""
+        return {_date.fromordinal(d).isoformat(): r for d, r in sorted(self._daily_revenue.items())}
+
+    @_cached
+    @_ledger_locked
+    def chart_data(self, chart):
+        """The numbers behind one of CHARTS as plain lists, or None without sales."""
+        if chart not in CHARTS:
+            raise ValueError(f"Unknown chart {chart!r}; choose from {', '.join(CHARTS)}.")
         if not self.sales:
-            print("No sales to plot.")
-            return
-        agg = {}
+            return None
+        if chart == "monthly":
+            agg = self.monthly_revenue()
+            months = sorted(agg)
+            keep = lttb_indices(len(months), [agg[m] for m in months], CHART_MAX_POINTS)
+            return {"labels": [months[i] for i in keep], "values": [agg[months[i]] for i in keep]}
+        if chart == "genre":
+            # untagged sales are charted as "Unknown", together with any
+            # genre actually called that
+            genre_rev = {}
+            for g, r in self.genre_revenue().items():
+                g = g or "Unknown"
+                genre_rev[g] = genre_rev.get(g, 0.0) + r
+            return top_n_with_other(genre_rev, CHART_MAX_BARS)
+        if chart == "pie":
+            return top_n_with_other(self._revenue_by_title(), CHART_MAX_SLICES)
+        if not np:
+            raise ImportError("NumPy is required for the correlation heatmap.")
+        return {"labels": ["qty", "revenue"], "matrix": self._qty_revenue_corrcoef()}
+
+    def _revenue_by_title(self):
+        if self.columnar:
+            return self.sales.revenue_by_title()
+        revenue = {}
         for s in self.sales:
-            try:
-                d = datetime.strptime(s["date"], "%Y-%m-%d")
-            except Exception:
-                continue
-            key = d.strftime("%Y-%m")
-            agg[key] = agg.get(key, 0.0) + s["revenue"]
-        months = sorted(agg.keys())
-        values = [agg[m] for m in months]
-        plt.figure(figsize=(8,4))
-        plt.plot(months, values, marker="o")
-        plt.title("Monthly Revenue")
-        plt.xlabel("Month")
-        plt.ylabel("Revenue")
-        plt.grid(True)
-        plt.tight_layout()
-        plt.savefig(filename)
-        plt.close()
-        print(f"Saved monthly sales plot to {filename}")
-
-    def plot_genre_revenue_bar(self):
-        if not self.sales:
+            revenue[s["title"]] = revenue.get(s["title"], 0.0) + s["revenue"]
+        return revenue
+
+    def _qty_revenue_corrcoef(self):
+        if self.columnar:
+            qty, rev = self.sales.qty, self.sales.revenue_cents / 100
+        else:
+            qty = np.fromiter((s["qty"] for s in self.sales), dtype=float)
+            rev = np.fromiter((s["revenue"] for s in self.sales), dtype=float)
+        return np.corrcoef(qty, rev).tolist()
+
+    def _plot(self, chart, filename):
+        data = self.chart_data(chart)
+        if data is None:
             print("No sales data available.")
             return
-        if pd is None:
-            print("Pandas not installed.")
-            return
+        draw, what = CHARTS[chart]
+        draw(data)
+        _finish_plot(filename, what)
 
-        df_sales = pd.DataFrame(self.sales)
-        df_inv = pd.DataFrame(self.inventory)
+    def plot_monthly_sales(self, filename="monthly_sales.png"):
+        self._plot("monthly", filename)
 
-        merged = df_sales.merge(df_inv, on="title")
-        genre_rev = merged.groupby("genre")["revenue"].sum()
+    def plot_genre_revenue_bar(self, filename=None):
+        self._plot("genre", filename)
 
-        plt.figure(figsize=(8, 4))
-        plt.bar(genre_rev.index, genre_rev.values)
-        plt.title("Revenue by Genre")
-        plt.xlabel("Genre")
-        plt.ylabel("Revenue")
-        plt.tight_layout()
-        plt.show()
+    def plot_revenue_pie_chart(self, filename=None):
+        self._plot("pie", filename)
 
-    def plot_revenue_pie_chart(self):
-        if not self.sales:
-            print("No sales data available.")
-            return
-        if pd is None:
-            print("Pandas not installed.")
-            return
+    def plot_correlation_heatmap(self, filename=None):
+        self._plot("heatmap", filename)
 
-        df = pd.DataFrame(self.sales)
-        rev = df.groupby("title")["revenue"].sum()
 
-        plt.figure(figsize=(7, 7))
-        plt.pie(rev, labels=rev.index, autopct="%1.1f%%")
-        plt.title("Revenue Distribution by Book")
-        plt.tight_layout()
-        plt.show()
+# Past these sizes a chart is unreadable and slow to draw, so chart_data
+# keeps the largest categories plus "Other" and thins long series.
+CHART_MAX_SLICES = 12
+CHART_MAX_BARS = 20
+CHART_MAX_POINTS = 500
 
-    def plot_correlation_heatmap(self):
-        if not self.sales:
-            print("No sales data available.")
-            return
-        if pd is None:
-            print("Pandas not installed.")
-            return
 
-        df = pd.DataFrame(self.sales)
-        corr = df[["qty", "revenue"]].corr()
+def top_n_with_other(totals, n):
+    """{"labels", "values"} for the n largest totals, the rest summed as "Other"."""
+    if len(totals) <= n:
+        labels = sorted(totals)
+        return {"labels": labels, "values": [totals[k] for k in labels]}
+    keys = list(totals)
+    values = [totals[k] for k in keys]
+    if np:
+        arr = np.asarray(values, dtype=float)
+        top = np.argpartition(-arr, n - 1)[:n]
+        top = top[np.argsort(-arr[top], kind="stable")].tolist()
+    else:
+        top = heapq.nlargest(n, range(len(keys)), key=values.__getitem__)
+    labels = [keys[i] for i in top]
+    kept = [values[i] for i in top]
+    return {"labels": labels + ["Other"], "values": kept + [sum(values) - sum(kept)]}
 
-        import seaborn as sns
-        plt.figure(figsize=(5, 4))
-        sns.heatmap(corr, annot=True, cmap="coolwarm")
-        plt.title("Correlation Heatmap")
-        plt.tight_layout()
+
+def lttb_indices(n, values, threshold):
+    """Positions of the at most threshold points Largest-Triangle-Three-Buckets keeps."""
+    if n <= threshold or threshold < 3:
+        return list(range(n))
+    if not np:
+        step = (n - 1) / (threshold - 1)
+        return [round(i * step) for i in range(threshold)]
+    y = np.asarray(values, dtype=float)
+    every = (n - 2) / (threshold - 2)
+    keep = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = (end + next_end - 1) / 2
+        avg_y = y[end:next_end].mean()
+        xs = np.arange(start, end)
+        area = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep.append(a)
+    keep.append(n - 1)
+    return keep
+
+
+def _draw_monthly(data):
+    plt.figure(figsize=(8,4))
+    plt.plot(data["labels"], data["values"], marker="o")
+    plt.title("Monthly Revenue")
+    plt.xlabel("Month")
+    plt.ylabel("Revenue")
+    plt.grid(True)
+    plt.tight_layout()
+
+
+def _draw_genre_bar(data):
+    plt.figure(figsize=(8, 4))
+    plt.bar(data["labels"], data["values"])
+    plt.title("Revenue by Genre")
+    plt.xlabel("Genre")
+    plt.ylabel("Revenue")
+    plt.tight_layout()
+
+
+def _draw_pie(data):
+    plt.figure(figsize=(7, 7))
+    plt.pie(data["values"], labels=data["labels"], autopct="%1.1f%%")
+    plt.title("Revenue Distribution by Book")
+    plt.tight_layout()
+
+
+def _draw_heatmap(data):
+    import seaborn as sns
+    plt.figure(figsize=(5, 4))
+    sns.heatmap(data["matrix"], annot=True, cmap="coolwarm",
+                xticklabels=data["labels"], yticklabels=data["labels"])
+    plt.title("Correlation Heatmap")
+    plt.tight_layout()
+
+
+# chart name -> (draw(chart_data) onto a new figure, name used in messages)
+CHARTS = {
+    "monthly": (_draw_monthly, "monthly sales"),
+    "genre": (_draw_genre_bar, "genre revenue"),
+    "pie": (_draw_pie, "revenue pie chart"),
+    "heatmap": (_draw_heatmap, "correlation heatmap"),
+}
+
+
+def _finish_plot(filename, what):
+    # show interactively, or save for headless / scripted use
+    if filename is None:
         plt.show()
+        return
+    plt.savefig(filename)
+    plt.close()
+    print(f"Saved {what} plot to {filename}")
+
+
+SAMPLE_BOOKS = (
+    {"title":"Atomic Habits","author":"James Clear","genre":"Self-Help","price":11.0,"qty":40},
+    {"title":"The Alchemist","author":"Paulo Coelho","genre":"Fiction","price":9.99,"qty":50},
+    {"title":"Deep Work","author":"Cal Newport","genre":"Productivity","price":14.25,"qty":20},
+)
 
 
 def create_sample_data(store: Bookstore):
-    store.inventory = [
-        {"title":"Atomic Habits","author":"James Clear","genre":"Self-Help","price":11.0,"qty":40},
-        {"title":"The Alchemist","author":"Paulo Coelho","genre":"Fiction","price":9.99,"qty":50},
-        {"title":"Deep Work","author":"Cal Newport","genre":"Productivity","price":14.25,"qty":20},
-    ]
-    store.sales = [
+    # copies, since the store updates stock in place
+    store._set_inventory([dict(b) for b in SAMPLE_BOOKS])
+    store._set_sales([
         {"date":"2025-09-01","title":"Atomic Habits","qty":3,"revenue":33.0},
         {"date":"2025-09-15","title":"The Alchemist","qty":5,"revenue":49.95},
         {"date":"2025-10-02","title":"Atomic Habits","qty":7,"revenue":77.0},
-    ]
+    ])
     print("Sample data created (3 inventory items, 3 sales records).")
 
 
-def main():
-    store = Bookstore()
-    store.load_inventory_csv() 
-    store.load_sales_csv()
+SYNTHETIC_WORDS = ("Atomic", "Deep", "Silent", "Hidden", "Habits", "Work", "River", "Garden",
+                   "Alchemist", "Empire", "Winter", "Code", "Mind", "Night", "Journey", "Signal")
+SYNTHETIC_GENRES = ("Self-Help", "Fiction", "Productivity", "History", "Science",
+                    "Mystery", "Biography", "Fantasy", "Business", "Poetry")
+
+
+def generate_synthetic_data(store: Bookstore, n_books=1_000, n_sales=10_000, seed=0):
+    """Fill store with a reproducible catalog and ledger built from seed."""
+    rng = random.Random(seed)
+    books = [dict(b) for b in SAMPLE_BOOKS[:n_books]]
+    for i in range(len(books), n_books):
+        books.append({
+            "title": f"{rng.choice(SYNTHETIC_WORDS)} {rng.choice(SYNTHETIC_WORDS)} {i}",
+            "author": f"Author {rng.randrange(max(1, n_books // 20))}",
+            "genre": rng.choice(SYNTHETIC_GENRES),
+            "price": rng.randrange(499, 4000, 25) / 100,
+            "qty": rng.randrange(0, 200),
+        })
+    store._set_inventory(books)
+    if not books:
+        store._set_sales([])
+        return
+
+    first_day = _date(2023, 1, 1).toordinal()
+    days = [_date.fromordinal(first_day + d).isoformat() for d in range(3 * 365)]
+    cum_weights = list(itertools.accumulate(1 / (r + 1) for r in range(len(books))))
+    picks = rng.choices(range(len(books)), cum_weights=cum_weights, k=n_sales)
+
+    def sales():
+        for i in picks:
+            book = books[i]
+            qty = rng.randint(1, 5)
+            yield {"date": rng.choice(days), "title": book["title"], "qty": qty,
+                   "revenue": book["price"] * qty, "genre": book["genre"]}
+
+    store._set_sales(sales())
+    print(f"Synthetic data created ({n_books} inventory items, {n_sales} sales records, seed={seed}).")
+
+
+def _snapshot_is_fresh(dirname, *csv_files):
+    """True if dirname holds a snapshot at least as new as every CSV."""
+    meta = os.path.join(dirname, "meta.json")
+    if not os.path.exists(meta):
+        return False
+    with open(meta, encoding="utf-8") as f:
+        if json.load(f).get("version") != SNAPSHOT_VERSION:
+            return False
+    stamp = os.path.getmtime(meta)
+    return all(not os.path.exists(f) or os.path.getmtime(f) <= stamp for f in csv_files)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="bookmarkanalytic",
+        description="Bookstore inventory and sales tool. Run without a command for the interactive menu.")
+    parser.add_argument("--inventory", default="inventory.csv", help="inventory CSV (default: %(default)s)")
+    parser.add_argument("--sales", default="sales.csv", help="sales CSV (default: %(default)s)")
+    parser.add_argument("--snapshot", default="bookstore.snapshot",
+                        help="binary snapshot used for fast startup (default: %(default)s)")
+    parser.add_argument("--db", help="use this SQLite database instead of the CSV files")
+    parser.add_argument("--stats", choices=["json", "prometheus"],
+                        help="time every operation and print the metrics to stderr on exit")
+    parser.add_argument("--partitions", metavar="DIR",
+                        help="keep sales as month-partitioned CSVs in DIR and compute reports across processes")
+    sub = parser.add_subparsers(dest="command", metavar="command")
+
+    p = sub.add_parser("report", help="print the sales report")
+    p.add_argument("--top", type=int, default=5, help="number of top sellers to list")
+
+    p = sub.add_parser("search", help="find titles by prefix or approximate spelling")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=10, help="most titles to list")
+
+    p = sub.add_parser("reorder", help="list titles at or below their reorder point")
+    p.add_argument("--threshold", type=int, help="use this reorder point for every title")
+    p.add_argument("--limit", type=int, default=20, help="most titles to list")
+
+    p = sub.add_parser("import-sales", help="record every sale in a CSV (title, qty[, date]) and save")
+    p.add_argument("file")
+
+    p = sub.add_parser("plot", help="render a chart to an image file")
+    p.add_argument("chart", choices=[*CHARTS, "all"])
+    p.add_argument("--out", required=True,
+                   help="output file, e.g. monthly.png or genre.svg; a directory for 'all'")
+
+    p = sub.add_parser("export", help="write the data out as CSV and/or a snapshot")
+    p.add_argument("--inventory-out", help="inventory CSV to write")
+    p.add_argument("--sales-out", help="sales CSV to write")
+    p.add_argument("--snapshot-out", help="snapshot directory to write")
+    return parser
+
+
+def _load_store(args):
+    instrument = bool(args.stats)
+    if args.db:
+        from booksqlite import SQLiteBookstore
+        return SQLiteBookstore(args.db, instrument=instrument)
+    if args.partitions:
+        from bookpartition import PartitionedBookstore
+        store = PartitionedBookstore(args.partitions, instrument=instrument)
+        store.load_inventory_csv(args.inventory)
+        if not store.sales.partitions():
+            # first run against this directory: split the flat file.  Later
+            # runs skip the import, so nothing may stay in the buffer.
+            store.load_sales_csv(args.sales)
+            store.sales.flush()
+        return store
+    store = Bookstore(instrument=instrument)
+    if _snapshot_is_fresh(args.snapshot, args.inventory, args.sales) and np:
+        store.load_snapshot(args.snapshot)
+    else:
+        store.load_inventory_csv(args.inventory)
+        store.load_sales_csv(args.sales)
+    return store
+
+
+def _save_store(store, args):
+    if args.db:
+        print(f"{args.db} is up to date (every change is committed as it happens).")
+        return
+    store.save_inventory_csv(args.inventory)
+    if args.partitions:
+        store.save_sales_csv()
+        return
+    store.save_sales_csv(args.sales)
+    if np:
+        store.save_snapshot(args.snapshot)
+
+
+def _read_sale_rows(filename):
+    with open(filename, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        names = _resolve_columns(reader.fieldnames or [], SALES_COLUMNS)
+        if names["title"] is None or names["qty"] is None:
+            raise ValueError(f"{filename} needs title and qty columns.")
+        return [{"title": row[names["title"]], "qty": row[names["qty"]],
+                 "date": _csv_field(row, names["date"], "") or None} for row in reader]
+
+
+def run_command(store, args):
+    if args.command == "report":
+        store.generate_report(args.top)
+    elif args.command == "search":
+        matches = store.search_titles(args.query, args.limit)
+        print("\n".join(matches) if matches else f"No titles match {args.query!r}.")
+    elif args.command == "reorder" and args.threshold is not None:
+        low = store.low_stock(args.threshold, args.limit)
+        print("\n".join(f"{t}: {q}" for t, q in low) if low else f"No titles at or below {args.threshold}.")
+    elif args.command == "reorder":
+        store.reorder_report(args.limit)
+    elif args.command == "import-sales":
+        store.record_sales(_read_sale_rows(args.file))
+        _save_store(store, args)
+    elif args.command == "plot" and args.chart == "all":
+        from bookcharts import render_chart_pack
+        rendered, skipped = render_chart_pack({"": store}, args.out)
+        print(f"Rendered {rendered} charts ({skipped} unchanged) into {args.out}")
+    elif args.command == "plot":
+        plots = {
+            "monthly": store.plot_monthly_sales,
+            "genre": store.plot_genre_revenue_bar,
+            "pie": store.plot_revenue_pie_chart,
+            "heatmap": store.plot_correlation_heatmap,
+        }
+        plots[args.chart](args.out)
+    elif args.command == "export":
+        if not (args.inventory_out or args.sales_out or args.snapshot_out):
+            raise ValueError("Nothing to export; pass --inventory-out, --sales-out and/or --snapshot-out.")
+        if args.inventory_out:
+            store.save_inventory_csv(args.inventory_out)
+        if args.sales_out:
+            store.save_sales_csv(args.sales_out)
+        if args.snapshot_out:
+            store.save_snapshot(args.snapshot_out)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    store = _load_store(args)
+    try:
+        if args.command:
+            try:
+                run_command(store, args)
+            except (ValueError, ImportError, OSError) as e:
+                print("Error:", e, file=sys.stderr)
+                return 1
+            return 0
+        menu(store, args)
+        return 0
+    finally:
+        if args.stats:
+            print(store.stats(args.stats), file=sys.stderr)
+        if args.db or args.partitions:
+            store.close()
+
 
+def menu(store, args):
     while True:
         print("\n--- Simple Bookstore Menu ---")
         print("1) Show inventory")
@@ -351,8 +2564,7 @@ def main():
                 store.generate_report()
                 store.total_revenue_numpy()
             elif choice == "7":
-                store.save_inventory_csv()
-                store.save_sales_csv()
+                _save_store(store, args)
             elif choice == "8":
                 create_sample_data(store)
             elif choice == "9":
@@ -372,4 +2584,4 @@ def main():
             print("Error:", e)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
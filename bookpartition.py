@@ -0,0 +1,321 @@
+import csv
+import heapq
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from bookmarkanalytic import (SALES_COLUMNS, SALES_FIELDS, Bookstore, _cached, _columns_to_records, _day_ordinal,
+                              _ledger_locked, _months_from_days, _parse_date, _write_atomic, _write_csv_rows)
+
+UNDATED = "undated"
+FLUSH_ROWS = 10_000
+CACHE_FILE = "aggregates.json"
+
+
+def partition_key(date):
+    d = _parse_date(date)
+    return d.strftime("%Y-%m") if d else UNDATED
+
+
+def aggregate_partition(path):
+    """Partial aggregates for one partition file.
+
+    This is the map step; it runs in a worker process, so it only takes
+    a path and returns plain JSON-able data.
+    """
+    rows = units = 0
+    revenue = 0.0
+    titles, genre_revenue, genre_units, days, day_units = {}, {}, {}, {}, {}
+    day_keys = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            qty = int(float(row["qty"]))
+            rev = float(row["revenue"])
+            genre = row.get("genre") or ""
+            rows += 1
+            units += qty
+            revenue += rev
+            titles[row["title"]] = titles.get(row["title"], 0) + qty
+            genre_revenue[genre] = genre_revenue.get(genre, 0.0) + rev
+            genre_units[genre] = genre_units.get(genre, 0) + qty
+            date = row["date"]
+            day = day_keys.get(date, False)
+            if day is False:
+                d = _parse_date(date)
+                day = day_keys[date] = d.isoformat() if d else None
+            if day is not None:
+                days[day] = days.get(day, 0.0) + rev
+                day_units[day] = day_units.get(day, 0) + qty
+    return {"rows": rows, "units": units, "revenue": revenue, "titles": titles,
+            "genre_revenue": genre_revenue, "genre_units": genre_units, "days": days, "day_units": day_units}
+
+
+def merge_partials(partials):
+    """Reduce step: fold partition aggregates, in month order, into one."""
+    total = {"rows": 0, "units": 0, "revenue": 0.0, "titles": {},
+             "genre_revenue": {}, "genre_units": {}, "days": {}, "day_units": {}}
+    for p in partials:
+        total["rows"] += p["rows"]
+        total["units"] += p["units"]
+        total["revenue"] += p["revenue"]
+        for key in ("titles", "genre_revenue", "genre_units", "days", "day_units"):
+            into = total[key]
+            for k, v in p[key].items():
+                into[k] = into.get(k, 0) + v
+    return total
+
+
+class PartitionedLedger:
+    """List look-alike for sales kept as one CSV file per month.
+
+    Partitions are ``sales-YYYY-MM.csv`` in dirname, plus
+    ``sales-undated.csv`` for rows whose date doesn't parse.  Appends
+    are buffered per month and written in batches.  aggregate() runs
+    aggregate_partition over the files in a process pool and merges the
+    results; every month before the newest one is treated as closed and
+    its partial is cached (in memory and in aggregates.json) against the
+    file's size and mtime, so normally only the open month is re-read.
+    A back-dated sale changes the closed file's stamp and that month is
+    recomputed on the next call.
+
+    Iteration yields the rows partition by partition in month order, not
+    in the order they were recorded.
+    """
+
+    def __init__(self, dirname="sales.partitions", processes=None):
+        self.dirname = dirname
+        self.processes = processes
+        os.makedirs(dirname, exist_ok=True)
+        self._buffer = {}
+        self._buffered = 0
+        self._rows = None
+        self._cache = self._read_cache()
+
+    def _path(self, key):
+        return os.path.join(self.dirname, f"sales-{key}.csv")
+
+    def _read_cache(self):
+        try:
+            with open(os.path.join(self.dirname, CACHE_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self._cache, f)
+
+    def partitions(self):
+        """[(key, path)] in month order, the undated partition last."""
+        self.flush()
+        keys = sorted(name[len("sales-"):-len(".csv")] for name in os.listdir(self.dirname)
+                      if name.startswith("sales-") and name.endswith(".csv"))
+        keys.sort(key=lambda k: k == UNDATED)
+        return [(k, self._path(k)) for k in keys]
+
+    # ------------------------- WRITES ------------------------- #
+
+    def append(self, sale):
+        self._buffer.setdefault(partition_key(sale["date"]), []).append(sale)
+        self._buffered += 1
+        if self._rows is not None:
+            self._rows += 1
+        if self._buffered >= FLUSH_ROWS:
+            self.flush()
+
+    def extend(self, sales):
+        for sale in sales:
+            self.append(sale)
+
+    def flush(self):
+        """Write buffered sales out to their month files."""
+        for key, rows in self._buffer.items():
+            path = self._path(key)
+            new = not os.path.exists(path)
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=SALES_FIELDS, extrasaction="ignore")
+                if new:
+                    writer.writeheader()
+                writer.writerows(rows)
+        self._buffer = {}
+        self._buffered = 0
+
+    def clear(self):
+        self._buffer = {}
+        self._buffered = 0
+        for _, path in self.partitions():
+            os.remove(path)
+        self._cache = {}
+        cache = os.path.join(self.dirname, CACHE_FILE)
+        if os.path.exists(cache):
+            os.remove(cache)
+        self._rows = 0
+
+    def close(self):
+        self.flush()
+
+    # ------------------------- READS ------------------------- #
+
+    def __len__(self):
+        if self._rows is None:
+            self._rows = self.aggregate()["rows"]
+        return self._rows
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        for _, path in self.partitions():
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    yield {"date": row["date"], "title": row["title"], "qty": int(float(row["qty"])),
+                           "revenue": float(row["revenue"]), "genre": row.get("genre") or ""}
+
+    def aggregate(self):
+        parts = self.partitions()
+        months = [k for k, _ in parts if k != UNDATED]
+        open_month = months[-1] if months else None
+        partials, todo = {}, []
+        for key, path in parts:
+            st = os.stat(path)
+            stamp = [st.st_mtime_ns, st.st_size]
+            hit = self._cache.get(key)
+            # partials cached before day_units was tracked are recomputed
+            if key not in (open_month, UNDATED) and hit and hit["stamp"] == stamp and "day_units" in hit["partial"]:
+                partials[key] = hit["partial"]
+            else:
+                todo.append((key, path, stamp))
+
+        paths = [path for _, path, _ in todo]
+        if len(todo) > 1 and self.processes != 1:
+            # only cold starts and back-dated months get here, so a
+            # short-lived pool costs less than keeping workers around
+            with ProcessPoolExecutor(self.processes) as pool:
+                results = list(pool.map(aggregate_partition, paths))
+        else:
+            results = map(aggregate_partition, paths)
+
+        closed = False
+        for (key, _, stamp), partial in zip(todo, results):
+            partials[key] = partial
+            if key not in (open_month, UNDATED):
+                self._cache[key] = {"stamp": stamp, "partial": partial}
+                closed = True
+        if closed:
+            _write_atomic(os.path.join(self.dirname, CACHE_FILE), self._write_cache)
+
+        total = merge_partials(partials[k] for k, _ in parts)
+        self._rows = total["rows"]
+        return total
+
+
+class PartitionedBookstore(Bookstore):
+    """Bookstore whose sales history lives in month-partitioned CSVs.
+
+    Inventory is held in memory as usual.  Sales go to a
+    PartitionedLedger instead of a list, and generate_report, the
+    monthly and genre breakdowns and their plots are computed by
+    map-reduce over the partitions rather than from running totals.
+    """
+
+    def __init__(self, dirname="sales.partitions", processes=None, columnar=False, thread_safe=False,
+                 instrument=False):
+        super().__init__(columnar=columnar, thread_safe=thread_safe, instrument=instrument)
+        self.sales = PartitionedLedger(dirname, processes)
+
+    def _set_sales(self, records=(), cols=None):
+        self.sales.clear()
+        self._extend_sales(records, cols)
+
+    def _extend_sales(self, records=(), cols=None):
+        if cols is not None:
+            # every row is written to a partition file as a dict anyway
+            records = itertools.chain(_columns_to_records(cols, SALES_COLUMNS), records)
+        for sale in records:
+            if not sale.get("genre"):
+                idx = self._position(sale["title"].lower())
+                sale["genre"] = self.inventory[idx]["genre"] if idx != -1 else ""
+            self.sales.append(sale)
+        self._bump_version()
+
+    def _apply_sale(self, sale):
+        # the running totals are replaced by partition aggregates
+        pass
+
+    def open_journal(self, *args, **kwargs):
+        raise ValueError("PartitionedBookstore writes sales straight to its partitions; no journal is needed.")
+
+    def save_snapshot(self, dirname="bookstore.snapshot"):
+        raise ValueError("PartitionedBookstore persists sales to its partitions; export with save_*_csv instead.")
+
+    def load_snapshot(self, dirname="bookstore.snapshot"):
+        raise ValueError("PartitionedBookstore reads sales from its partitions; import CSVs with load_*_csv instead.")
+
+    @_ledger_locked
+    def save_sales_csv(self, filename=None):
+        """Flush buffered sales to the partitions; with filename, also export one combined CSV."""
+        self.sales.flush()
+        if filename is None:
+            print(f"Sales partitions in {self.sales.dirname} are up to date")
+            return
+        _write_atomic(filename, lambda p: _write_csv_rows(p, SALES_FIELDS, self.sales))
+        print(f"Saved sales to {filename}")
+
+    def close(self):
+        self.sales.close()
+
+    # ------------------------- REPORTS ------------------------- #
+
+    @_cached
+    @_ledger_locked
+    def _aggregate(self):
+        # aggregate() still stats every partition; this skips even that
+        # until the next sale or load through this store
+        return self.sales.aggregate()
+
+    @_cached
+    @_ledger_locked
+    def top_sellers(self, k=5):
+        return heapq.nlargest(k, self._aggregate()["titles"].items(), key=lambda kv: kv[1])
+
+    @_cached
+    @_ledger_locked
+    def report_data(self, top=5):
+        agg = self._aggregate()
+        return {
+            "total_books": len(self.inventory),
+            "total_stock": self._stock_total,
+            "total_sold": agg["units"],
+            "total_revenue": agg["revenue"],
+            "top_sellers": heapq.nlargest(top, agg["titles"].items(), key=lambda kv: kv[1]),
+        }
+
+    @_ledger_locked
+    def total_revenue_numpy(self):
+        total = self._aggregate()["revenue"]
+        print(f"(partitions) Total revenue = {total:.2f}")
+        return total
+
+    @_ledger_locked
+    def monthly_revenue(self):
+        return _months_from_days(self._aggregate()["days"])
+
+    @_ledger_locked
+    def daily_revenue(self):
+        return dict(sorted(self._aggregate()["days"].items()))
+
+    def _date_index(self):
+        agg = self._aggregate()
+        days = sorted(agg["days"])
+        return ([_day_ordinal(d) for d in days],
+                [0.0, *itertools.accumulate(agg["days"][d] for d in days)],
+                [0, *itertools.accumulate(agg["day_units"][d] for d in days)])
+
+    @_ledger_locked
+    def genre_revenue(self):
+        return dict(self._aggregate()["genre_revenue"])
+
+    @_ledger_locked
+    def genre_units(self):
+        return dict(self._aggregate()["genre_units"])
@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import json
+import sys
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+from bookmarkanalytic import Bookstore, _quiet
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def _sale_payload(payload):
+    """Check a POST /sales body before it is queued with other clients' sales."""
+    if not isinstance(payload, dict):
+        raise ValueError("Sale must be a JSON object.")
+    title, qty, date = payload.get("title"), payload.get("qty"), payload.get("date")
+    if not isinstance(title, str):
+        raise ValueError("title must be a string.")
+    if isinstance(qty, bool) or not isinstance(qty, (int, float, str)):
+        raise ValueError("qty must be a number.")
+    if date is not None and not isinstance(date, str):
+        raise ValueError("date must be a YYYY-MM-DD string.")
+    return {"title": title, "qty": qty, "date": date}
+
+
+class BookstoreService:
+    """HTTP/JSON front end for one Bookstore, served with asyncio.
+
+    GET  /inventory          -> {"books": [...]}
+    GET  /report?top=N       -> report_data()
+    GET  /stats              -> store.stats() (empty unless metrics are on)
+    POST /books              {"title", "author", "genre", "price", "qty"}
+    POST /sales              {"title", "qty", "date"?}
+
+    Sale requests arriving within batch_window seconds of each other are
+    queued and written with a single record_sales call; if that batch is
+    rejected the sales are retried one by one so each client still gets
+    its own answer.  Inventory and report responses are cached until the
+    next successful write.
+    """
+
+    def __init__(self, store, batch_window=0.002, max_batch=512):
+        self.store = store
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_handle = None
+        self._cache = {}
+        self.batches = 0
+
+    # ------------------------- WRITES ------------------------- #
+
+    def _invalidate(self):
+        self._cache.clear()
+
+    async def record_sale(self, payload):
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        # this runs as a loop callback: anything that escapes would leave
+        # every client in the batch waiting forever, so catch it all
+        try:
+            _quiet(self.store.record_sales, [p for p, _ in batch])
+        except Exception:
+            for payload, fut in batch:
+                try:
+                    _quiet(self.store.record_sale, payload["title"], payload["qty"], payload.get("date"))
+                    fut.set_result((200, {"ok": True}))
+                except (ValueError, KeyError, TypeError) as e:
+                    fut.set_result((400, {"error": str(e)}))
+                except Exception as e:
+                    fut.set_result((500, {"error": str(e)}))
+        else:
+            for _, fut in batch:
+                fut.set_result((200, {"ok": True}))
+        self._invalidate()
+
+    def add_book(self, payload):
+        _quiet(self.store.add_book, payload["title"], payload.get("author", ""), payload.get("genre", ""),
+               payload["price"], payload["qty"])
+        self._invalidate()
+        return 200, {"ok": True}
+
+    # ------------------------- READS ------------------------- #
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def inventory(self):
+        books = self._cached("inventory", lambda: [dict(b) for b in self.store._inventory_records()])
+        return 200, {"books": books}
+
+    def report(self, top=5):
+        return 200, self._cached(("report", top), lambda: self.store.report_data(top))
+
+    # ------------------------- HTTP ------------------------- #
+
+    async def dispatch(self, method, path, body):
+        url = urlsplit(path)
+        query = dict(p.split("=", 1) for p in url.query.split("&") if "=" in p)
+        try:
+            payload = json.loads(body) if body else {}
+            if url.path == "/sales" and method == "POST":
+                return await self.record_sale(_sale_payload(payload))
+            if url.path == "/books" and method == "POST":
+                if not isinstance(payload, dict):
+                    raise ValueError("Book must be a JSON object.")
+                return self.add_book(payload)
+            if url.path == "/inventory" and method == "GET":
+                return self.inventory()
+            if url.path == "/report" and method == "GET":
+                return self.report(int(query.get("top", 5)))
+            if url.path == "/stats" and method == "GET":
+                return 200, self.store.stats()
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": str(e)}
+        if url.path in ("/sales", "/books", "/inventory", "/report", "/stats"):
+            return 405, {"error": f"{method} not allowed on {url.path}"}
+        return 404, {"error": f"no such endpoint {url.path}"}
+
+    @staticmethod
+    async def _respond(writer, status, result, keep_alive):
+        data = json.dumps(result).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    # without a request line or body length the stream
+                    # can't be resynced, so answer and hang up
+                    await self._respond(writer, 400, {"error": "malformed request"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    status, result = await self.dispatch(method, path, body)
+                except Exception as e:
+                    status, result = 500, {"error": str(e)}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        return await asyncio.start_server(self.handle, host, port)
+
+
+class BookstoreClient:
+    """Minimal blocking client for BookstoreService, for scripts and tests."""
+
+    def __init__(self, host="127.0.0.1", port=8765, timeout=10):
+        self.conn = HTTPConnection(host, port, timeout=timeout)
+
+    def _call(self, method, path, payload=None):
+        body = json.dumps(payload) if payload is not None else None
+        self.conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        resp = self.conn.getresponse()
+        result = json.loads(resp.read())
+        if resp.status != 200:
+            raise ValueError(result.get("error", f"HTTP {resp.status}"))
+        return result
+
+    def inventory(self):
+        return self._call("GET", "/inventory")["books"]
+
+    def report(self, top=5):
+        return self._call("GET", f"/report?top={top}")
+
+    def add_book(self, title, author, genre, price, qty):
+        return self._call("POST", "/books", {"title": title, "author": author, "genre": genre,
+                                             "price": price, "qty": qty})
+
+    def record_sale(self, title, qty, date=None):
+        payload = {"title": title, "qty": qty}
+        if date:
+            payload["date"] = date
+        return self._call("POST", "/sales", payload)
+
+    def close(self):
+        self.conn.close()
+
+
+async def serve(store, host, port, batch_window):
+    service = BookstoreService(store, batch_window=batch_window)
+    server = await service.start(host, port)
+    print(f"Serving bookstore on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a Bookstore over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--inventory", default="inventory.csv")
+    parser.add_argument("--sales", default="sales.csv")
+    parser.add_argument("--db", help="serve a SQLite database instead of the journaled CSV files")
+    parser.add_argument("--metrics", action="store_true", help="time store operations; served at /stats")
+    parser.add_argument("--batch-window", type=float, default=0.002,
+                        help="seconds to wait while coalescing sale requests (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        from booksqlite import SQLiteBookstore
+        store = SQLiteBookstore(args.db, instrument=args.metrics)
+    else:
+        store = Bookstore(instrument=args.metrics)
+        store.open_journal(args.inventory, args.sales)
+    try:
+        asyncio.run(serve(store, args.host, args.port, args.batch_window))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if not args.db:
+            store.close_journal()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
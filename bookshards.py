@@ -0,0 +1,325 @@
+import argparse
+import csv
+import heapq
+import multiprocessing
+import os
+import sys
+from datetime import date as _date
+
+from bookmarkanalytic import (SALES_COLUMNS, Bookstore, _csv_field, _months_from_days, _quiet, _resolve_columns,
+                              _split_sale_rows, positive_int)
+from bookpartition import merge_partials
+
+
+def shard_partial(store):
+    """Partial aggregates for one branch store.
+
+    Same shape as bookpartition.aggregate_partition, plus the branch's
+    book and stock counts, so merge_partials can fold branches together.
+    """
+    report = store.report_data(top=0)
+    return {
+        "rows": len(store.sales),
+        "units": report["total_sold"],
+        "revenue": report["total_revenue"],
+        "books": report["total_books"],
+        "stock": report["total_stock"],
+        "titles": dict(store._title_units),
+        "genre_revenue": store.genre_revenue(),
+        "genre_units": store.genre_units(),
+        "days": store.daily_revenue(),
+        "day_units": {_date.fromordinal(d).isoformat(): u for d, u in sorted(store._daily_units.items())},
+    }
+
+
+def check_sales(store, rows):
+    """Raise ValueError if store.record_sales(rows) would; changes nothing."""
+    titles, qtys, _ = _split_sale_rows(rows)
+    demand = {}
+    for title, qty in zip(titles, qtys):
+        idx = store.find_book_index(title)
+        if idx == -1:
+            raise ValueError(f"Book not in inventory: {title!r}.")
+        demand[idx] = demand.get(idx, 0) + positive_int(qty, "Quantity sold")
+    for idx, units in demand.items():
+        book = store.inventory[idx]
+        if units > book["qty"]:
+            raise ValueError(f"Not enough copies in stock for {book['title']!r}.")
+
+
+# calls a shard runs on its store that aren't Bookstore methods
+SHARD_FUNCTIONS = {"partial": shard_partial, "check_sales": check_sales}
+
+
+def _serve_shard(conn, dirname, columnar):
+    """Worker loop: own one branch's store and run what the manager sends.
+
+    Messages are (method, args, kwargs); replies are (True, result) or
+    (False, exception).  None shuts the shard down.
+    """
+    try:
+        store = Bookstore(columnar=columnar)
+        os.makedirs(dirname, exist_ok=True)
+        _quiet(store.open_journal, os.path.join(dirname, "inventory.csv"), os.path.join(dirname, "sales.csv"))
+    except Exception as e:
+        conn.send((False, e))
+        return
+    conn.send((True, None))
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            method, args, kwargs = msg
+            try:
+                if method in SHARD_FUNCTIONS:
+                    result = SHARD_FUNCTIONS[method](store, *args, **kwargs)
+                else:
+                    result = _quiet(getattr(store, method), *args, **kwargs)
+            except Exception as e:
+                conn.send((False, e))
+            else:
+                conn.send((True, result))
+    finally:
+        _quiet(store.close_journal)
+        conn.close()
+
+
+class ShardedBookstore:
+    """Chain of branch stores, one worker process per branch.
+
+    branches maps a branch name to a directory holding that branch's
+    inventory.csv and sales.csv; each worker opens its pair with
+    open_journal, so sales are persisted as they are recorded and
+    nothing about one branch lives in this process.  Calls for one
+    branch go to its worker; chain-wide reports ask every worker for
+    shard_partial at once and merge the results here, so a report costs
+    about as much as the largest branch rather than the sum of them.
+
+    record_sales has every branch check its rows before any branch
+    records them, so a batch is taken whole or not at all.  That relies
+    on the manager being the only writer, and a manager is not safe to
+    share between threads.
+    """
+
+    def __init__(self, branches=None, columnar=False):
+        self.columnar = columnar
+        self._shards = {}
+        self._start(branches or {})
+
+    def _start(self, branches):
+        started = {}
+        for name, dirname in branches.items():
+            if name in self._shards or name in started:
+                raise ValueError(f"Branch {name!r} is already open.")
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_serve_shard, args=(child, dirname, self.columnar),
+                                           name=f"shard-{name}", daemon=True)
+            proc.start()
+            child.close()
+            started[name] = (proc, parent)
+        # the workers load their CSVs side by side; wait for all of them
+        failed = None
+        for name, (proc, conn) in started.items():
+            ok, error = conn.recv()
+            if not ok:
+                failed = failed or error
+                started[name] = (proc, None)
+        if failed is None:
+            self._shards.update(started)
+            return
+        # all or nothing: shut down the branches that did open
+        for proc, conn in started.values():
+            if conn is not None:
+                conn.send(None)
+            proc.join()
+        raise failed
+
+    def add_branch(self, name, dirname):
+        self._start({name: dirname})
+
+    @property
+    def branches(self):
+        return list(self._shards)
+
+    def close(self):
+        for proc, conn in self._shards.values():
+            conn.send(None)
+        for proc, conn in self._shards.values():
+            proc.join()
+            conn.close()
+        self._shards = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------- DISPATCH ------------------------- #
+
+    def _conn(self, branch):
+        try:
+            return self._shards[branch][1]
+        except KeyError:
+            raise ValueError(f"Unknown branch {branch!r}.") from None
+
+    def call(self, branch, method, *args, **kwargs):
+        """Run a Bookstore method in one branch's worker and return its result."""
+        return self.call_many({branch: (method, args, kwargs)})[branch]
+
+    def call_many(self, calls):
+        """Run {branch: (method, args, kwargs)} in the workers concurrently.
+
+        Every branch is sent its call before any reply is read, so the
+        workers run side by side.  Replies are all collected even when
+        one fails; the first failure is then raised, a ValueError with
+        the branch name in front of its message.
+        """
+        conns = {branch: self._conn(branch) for branch in calls}
+        for branch, (method, args, kwargs) in calls.items():
+            conns[branch].send((method, tuple(args), dict(kwargs)))
+        results, failed = {}, None
+        for branch, conn in conns.items():
+            ok, result = conn.recv()
+            if ok:
+                results[branch] = result
+            elif failed is None:
+                failed = ValueError(f"{branch}: {result}") if isinstance(result, ValueError) else result
+        if failed is not None:
+            raise failed
+        return results
+
+    def broadcast(self, method, *args, **kwargs):
+        """{branch: result} of the same call run in every worker."""
+        return self.call_many({branch: (method, args, kwargs) for branch in self._shards})
+
+    # ------------------------- WRITES ------------------------- #
+
+    def add_book(self, branch, title, author, genre, price, qty):
+        self.call(branch, "add_book", title, author, genre, price, qty)
+
+    def update_book(self, branch, title, price=None, qty=None):
+        self.call(branch, "update_book", title, price, qty)
+
+    def record_sale(self, branch, title, qty, date=None):
+        self.call(branch, "record_sale", title, qty, date)
+
+    def record_sales(self, rows):
+        """Route a batch of sales to their branches and record them there.
+
+        rows are dicts with a branch key besides Bookstore.record_sales's
+        title/qty[/date], or (branch, title, qty[, date]) tuples.  Returns
+        the number of sales recorded.
+        """
+        by_branch = {}
+        for row in rows:
+            if isinstance(row, dict):
+                row = dict(row)
+                branch = row.pop("branch")
+            else:
+                branch, *row = row
+            by_branch.setdefault(branch, []).append(row)
+        unknown = [b for b in by_branch if b not in self._shards]
+        if unknown:
+            raise ValueError(f"Unknown branch {unknown[0]!r} ({len(unknown)} unknown branch(es)).")
+        # nothing else writes to the shards between the check and the
+        # commit, so a batch that passes every branch's check goes in whole
+        self.call_many({b: ("check_sales", (batch,), {}) for b, batch in by_branch.items()})
+        counts = self.call_many({b: ("record_sales", (batch,), {}) for b, batch in by_branch.items()})
+        return sum(counts.values())
+
+    # ------------------------- REPORTS ------------------------- #
+
+    def aggregate(self):
+        """Every branch's shard_partial, computed in parallel and merged."""
+        partials = self.broadcast("partial")
+        total = merge_partials(partials.values())
+        total["books"] = sum(p["books"] for p in partials.values())
+        total["stock"] = sum(p["stock"] for p in partials.values())
+        return total
+
+    def report_data(self, top=5):
+        agg = self.aggregate()
+        return {
+            "total_books": agg["books"],
+            "total_stock": agg["stock"],
+            "total_sold": agg["units"],
+            "total_revenue": agg["revenue"],
+            "top_sellers": heapq.nlargest(top, agg["titles"].items(), key=lambda kv: kv[1]),
+        }
+
+    def branch_reports(self, top=5):
+        """{branch: report_data(top)} for each branch on its own."""
+        return self.broadcast("report_data", top)
+
+    def generate_report(self, top=5):
+        report = self.report_data(top)
+        print("\n==== Chain Report ====")
+        print(f"Branches: {len(self._shards)}")
+        print(f"Books in catalogs: {report['total_books']}")
+        print(f"Total units in stock: {report['total_stock']}")
+        print(f"Total units sold: {report['total_sold']}")
+        print(f"Total revenue: {report['total_revenue']:.2f}")
+        if report["top_sellers"]:
+            print("Top sellers:")
+            for t, q in report["top_sellers"]:
+                print(f" - {t}: {q} copies")
+        print("======================\n")
+
+    def monthly_revenue(self):
+        return _months_from_days(self.aggregate()["days"])
+
+    def daily_revenue(self):
+        return dict(sorted(self.aggregate()["days"].items()))
+
+    def genre_revenue(self):
+        return self.aggregate()["genre_revenue"]
+
+    def genre_units(self):
+        return self.aggregate()["genre_units"]
+
+
+def _read_branch_rows(filename):
+    with open(filename, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        names = _resolve_columns(reader.fieldnames or [], SALES_COLUMNS)
+        if "branch" not in (reader.fieldnames or []) or names["title"] is None or names["qty"] is None:
+            raise ValueError(f"{filename} needs branch, title and qty columns.")
+        return [{"branch": row["branch"], "title": row[names["title"]], "qty": row[names["qty"]],
+                 "date": _csv_field(row, names["date"], "") or None} for row in reader]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chain-wide reports over branch stores, one process per branch.")
+    parser.add_argument("branches", nargs="+", help="branch directories, each with inventory.csv and sales.csv")
+    parser.add_argument("--top", type=int, default=5, help="number of top sellers to list")
+    parser.add_argument("--import-sales", metavar="FILE",
+                        help="record every sale in a CSV (branch, title, qty[, date]) before reporting")
+    parser.add_argument("--by-branch", action="store_true", help="also print each branch's totals")
+    args = parser.parse_args(argv)
+
+    branches = {}
+    for d in args.branches:
+        name = os.path.basename(os.path.normpath(d))
+        if name in branches:
+            parser.error(f"{d} and {branches[name]} would both be branch {name!r}; rename one directory.")
+        branches[name] = d
+    try:
+        with ShardedBookstore(branches) as chain:
+            if args.import_sales:
+                n = chain.record_sales(_read_branch_rows(args.import_sales))
+                print(f"Recorded {n} sales across {len(branches)} branches")
+            chain.generate_report(args.top)
+            if args.by_branch:
+                for name, report in chain.branch_reports(args.top).items():
+                    print(f"{name}: {report['total_sold']} sold, revenue {report['total_revenue']:.2f}, "
+                          f"{report['total_stock']} in stock")
+    except (ValueError, OSError) as e:
+        print("Error:", e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,417 @@
+import math
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import itertools
+
+from bookmarkanalytic import (INVENTORY_COLUMNS, Bookstore, TitleSearchIndex, _cached, _columns_to_records,
+                              _day_ordinal, _split_sale_rows, positive_float, positive_int)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    author TEXT NOT NULL DEFAULT '',
+    genre TEXT NOT NULL DEFAULT '',
+    price REAL NOT NULL,
+    qty INTEGER NOT NULL CHECK (qty >= 0)
+);
+CREATE INDEX IF NOT EXISTS books_genre ON books (genre);
+CREATE INDEX IF NOT EXISTS books_qty ON books (qty);
+
+CREATE TABLE IF NOT EXISTS sales (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    title TEXT NOT NULL COLLATE NOCASE,
+    qty INTEGER NOT NULL,
+    revenue REAL NOT NULL,
+    genre TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS sales_date ON sales (date);
+CREATE INDEX IF NOT EXISTS sales_title ON sales (title);
+"""
+
+# databases created before sales carried their genre
+MIGRATIONS = [
+    ("sales", "genre", "ALTER TABLE sales ADD COLUMN genre TEXT NOT NULL DEFAULT ''"),
+]
+POST_MIGRATION = "CREATE INDEX IF NOT EXISTS sales_genre ON sales (genre)"
+
+# Statements are kept as module constants so every call passes the
+# identical SQL text and hits sqlite3's per-connection statement cache
+# instead of being re-prepared.
+FIND_BOOK = "SELECT id, title, price, qty, genre FROM books WHERE title = ?"
+INSERT_BOOK = "INSERT INTO books (title, author, genre, price, qty) VALUES (?, ?, ?, ?, ?)"
+INSERT_BOOK_IGNORE = "INSERT OR IGNORE INTO books (title, author, genre, price, qty) VALUES (?, ?, ?, ?, ?)"
+DECREMENT_STOCK = "UPDATE books SET qty = qty - ? WHERE id = ? AND qty >= ?"
+INSERT_SALE = "INSERT INTO sales (date, title, qty, revenue, genre) VALUES (?, ?, ?, ?, ?)"
+
+
+class _TableView:
+    """Read-only, list-like view of a table that queries rather than loads it.
+
+    len() and truth tests are COUNT/EXISTS queries and iteration streams
+    rows as dicts, so inherited code can use it where it expects a list.
+    """
+
+    def __init__(self, store, table, columns):
+        self._store = store
+        self._table = table
+        self._columns = columns
+        self._select = f"SELECT {', '.join(columns)} FROM {table} ORDER BY id"
+
+    def __len__(self):
+        return self._store._db.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def __bool__(self):
+        return bool(self._store._db.execute(f"SELECT EXISTS (SELECT 1 FROM {self._table})").fetchone()[0])
+
+    def __iter__(self):
+        for row in self._store._db.execute(self._select):
+            yield dict(zip(self._columns, row))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            rows = self._store._db.execute(f"{self._select} LIMIT ? OFFSET ?", (max(stop - start, 0), start))
+            return [dict(zip(self._columns, row)) for row in rows][::step]
+        if i < 0:
+            i += len(self)
+        row = self._store._db.execute(f"{self._select} LIMIT 1 OFFSET ?", (i,)).fetchone() if i >= 0 else None
+        if row is None:
+            raise IndexError(f"{self._table} index out of range")
+        return dict(zip(self._columns, row))
+
+
+class SQLiteBookstore(Bookstore):
+    """Bookstore whose inventory and sales live in a local SQLite file.
+
+    Every change is committed as it happens, each thread gets its own
+    connection and the database runs in WAL mode, so report queries
+    don't block sale writers and writers queue on SQLite's lock; reports are
+    computed with SQL aggregates over indexed columns rather than by
+    pulling rows into Python.  ``inventory`` and ``sales`` are read-only
+    views that query the tables for the listing and plotting code; the
+    CSV loaders and create_sample_data import straight into the
+    database.
+    """
+
+    def __init__(self, path="bookstore.db", instrument=False):
+        # Bookstore.__init__ sets up the in-memory lists and indexes
+        # this backend replaces, so only its shared state is set up here
+        self.path = path
+        self.columnar = False
+        # the tables are isolated per connection; the store's own locks
+        # guard what stays in memory: the result cache, reorder points,
+        # low-stock callbacks and the search index
+        self._init_state(thread_safe=True)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        for table, column, sql in MIGRATIONS:
+            columns = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._db.execute(sql)
+        self._db.execute(POST_MIGRATION)
+        if instrument:
+            self.enable_metrics()
+
+    @property
+    def _db(self):
+        # one sqlite3 connection can't keep threads' transactions apart,
+        # so every thread opens its own on first use
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=30)
+            db.execute("PRAGMA synchronous=NORMAL")
+            with self._connections_lock:
+                self._connections.append(db)
+            self._local.db = db
+        return db
+
+    def close(self):
+        with self._connections_lock:
+            for db in self._connections:
+                db.close()
+            self._connections = []
+        self._local = threading.local()
+
+    @contextmanager
+    def _write(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so a sale's
+        # stock check and decrement can't interleave with another writer
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._db
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        self._bump_version()
+
+    @contextmanager
+    def _read(self):
+        # several SELECTs seeing one snapshot of the file
+        self._db.execute("BEGIN")
+        try:
+            yield self._db
+        finally:
+            self._db.execute("COMMIT")
+
+    def _cache_version(self):
+        # data_version moves when another connection commits to the file,
+        # which our own counter can't see.  It counts per connection, so
+        # the connection is part of the key too.
+        db = self._db
+        return self._version, id(db), db.execute("PRAGMA data_version").fetchone()[0]
+
+    # ------------------------- TABLE VIEWS ------------------------- #
+
+    @property
+    def inventory(self):
+        return _TableView(self, "books", ("title", "author", "genre", "price", "qty"))
+
+    @property
+    def sales(self):
+        return _TableView(self, "sales", ("date", "title", "qty", "revenue", "genre"))
+
+    def _inventory_records(self):
+        return self.inventory
+
+    def _set_inventory(self, records=(), cols=None):
+        if cols is not None:
+            records = _columns_to_records(cols, INVENTORY_COLUMNS)
+        with self._write() as db:
+            db.execute("DELETE FROM books")
+            db.executemany(INSERT_BOOK_IGNORE, (
+                (b["title"], b["author"], b["genre"], b["price"], b["qty"]) for b in records
+            ))
+        with self._catalog_write(), self._ledger():
+            if self._search_index is not None:
+                self._search_index = TitleSearchIndex(b["title"] for b in self._inventory_records())
+            self._refresh_low_titles()
+
+    def _set_sales(self, records=(), cols=None):
+        with self._write() as db:
+            db.execute("DELETE FROM sales")
+        self._extend_sales(records, cols)
+
+    def _extend_sales(self, records=(), cols=None):
+        with self._write() as db:
+            if cols is not None:
+                fields = ("date", "title", "qty", "revenue", "genre")
+                db.executemany(INSERT_SALE, zip(*(cols[f].tolist() for f in fields)))
+            db.executemany(INSERT_SALE, (
+                (s["date"], s["title"], s["qty"], s["revenue"], s.get("genre") or "") for s in records
+            ))
+            # rows imported without a genre take it from the catalog
+            db.execute("UPDATE sales SET genre = (SELECT b.genre FROM books b WHERE b.title = sales.title) "
+                       "WHERE genre = '' AND EXISTS (SELECT 1 FROM books b WHERE b.title = sales.title)")
+
+    def find_book_index(self, title):
+        """Row id of the book, or -1; there is no list position here."""
+        row = self._db.execute(FIND_BOOK, (title,)).fetchone()
+        return row[0] if row else -1
+
+    # ------------------------- CATALOG ------------------------- #
+
+    def add_book(self, title, author, genre, price, qty):
+        price = positive_float(price, "Price")
+        qty = positive_int(qty, "Quantity")
+        try:
+            with self._write() as db:
+                db.execute(INSERT_BOOK, (title, author, genre, price, qty))
+        except sqlite3.IntegrityError:
+            raise ValueError("Book already exists. Use update_book to change quantity/price.")
+        # the search index is read under the catalog read lock
+        with self._catalog_write(), self._ledger():
+            if self._search_index is not None:
+                self._search_index.add(title)
+            self._stock_changed(title, qty)
+        print(f"Added '{title}' (qty={qty}, price={price})")
+
+    def update_book(self, title, price=None, qty=None):
+        if price is not None:
+            price = positive_float(price, "Price")
+        if qty is not None:
+            qty = positive_int(qty, "Quantity")
+        with self._write() as db:
+            row = db.execute(FIND_BOOK, (title,)).fetchone()
+            if row is None:
+                raise ValueError("Book not found.")
+            book_id, stored_title, old_price, old_qty, _ = row
+            price = old_price if price is None else price
+            qty = old_qty if qty is None else qty
+            db.execute("UPDATE books SET price = ?, qty = ? WHERE id = ?", (price, qty, book_id))
+        with self._ledger():
+            self._stock_changed(stored_title, qty)
+        print(f"Updated '{title}' -> price={price}, qty={qty}")
+
+    def remove_book(self, title):
+        with self._write() as db:
+            row = db.execute(FIND_BOOK, (title,)).fetchone()
+            if row is None:
+                raise ValueError("Book not found.")
+            db.execute("DELETE FROM books WHERE id = ?", (row[0],))
+        with self._catalog_write(), self._ledger():
+            if self._search_index is not None:
+                self._search_index.remove(row[1])
+            self._low_titles.discard(row[1].lower())
+        print(f"Removed '{row[1]}' from inventory.")
+
+    def set_reorder_point(self, title, point):
+        point = positive_int(point, "Reorder point")
+        row = self._db.execute(FIND_BOOK, (title,)).fetchone()
+        if row is None:
+            raise ValueError("Book not found.")
+        with self._ledger():
+            self._reorder_points[row[1].lower()] = point
+            self._stock_changed(row[1], row[3])
+
+    def low_stock(self, threshold=None, limit=10):
+        if threshold is not None:
+            rows = self._db.execute("SELECT title, qty FROM books WHERE qty <= ? ORDER BY qty, lower(title) LIMIT ?",
+                                    (threshold, limit))
+            return [(t, q) for t, q in rows]
+        bound = max([self.reorder_point, *self._reorder_points.values()])
+        rows = self._db.execute("SELECT title, qty FROM books WHERE qty <= ? ORDER BY qty, lower(title)", (bound,))
+        return list(itertools.islice(((t, q) for t, q in rows if q <= self._reorder_point(t)), limit))
+
+    # ------------------------- SALES ------------------------- #
+
+    def _insert_sale(self, db, title, qty, date):
+        row = db.execute(FIND_BOOK, (title,)).fetchone()
+        if row is None:
+            raise ValueError(f"Book not in inventory: {title!r}.")
+        book_id, stored_title, price, stock, genre = row
+        # the conditional UPDATE is the stock check: no row changes if
+        # there aren't enough copies left
+        if db.execute(DECREMENT_STOCK, (qty, book_id, qty)).rowcount == 0:
+            raise ValueError(f"Not enough copies in stock for {stored_title!r}.")
+        revenue = price * qty
+        db.execute(INSERT_SALE, (date, stored_title, qty, revenue, genre))
+        return revenue, stored_title, stock - qty
+
+    def record_sale(self, title, qty, date=None):
+        qty = positive_int(qty, "Quantity sold")
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+        with self._write() as db:
+            revenue, stored_title, left = self._insert_sale(db, title, qty, date)
+        with self._ledger():
+            self._stock_changed(stored_title, left)
+        print(f"Recorded sale: {qty} x '{title}' (revenue {revenue:.2f})")
+
+    def record_sales(self, rows):
+        titles, qtys, dates = _split_sale_rows(rows)
+        qtys = [positive_int(q, "Quantity sold") for q in qtys]
+        today = datetime.now().strftime("%Y-%m-%d")
+        revenue = 0.0
+        left = {}
+        with self._write() as db:
+            for t, q, d in zip(titles, qtys, dates):
+                rev, stored_title, stock_left = self._insert_sale(db, t, q, d or today)
+                left[stored_title] = stock_left
+                revenue += rev
+        # only once the batch has committed, so a rejected import fires nothing
+        with self._ledger():
+            for stored_title, qty in left.items():
+                self._stock_changed(stored_title, qty)
+        if titles:
+            print(f"Recorded {len(titles)} sales ({sum(qtys)} copies, revenue {revenue:.2f})")
+        return len(titles)
+
+    # ------------------------- REPORTS ------------------------- #
+
+    @_cached
+    def top_sellers(self, k=5):
+        rows = self._db.execute(
+            "SELECT title, SUM(qty) AS units FROM sales GROUP BY title "
+            "ORDER BY units DESC, MIN(id) LIMIT ?", (k,))
+        return [(t, u) for t, u in rows]
+
+    @_cached
+    def report_data(self, top=5):
+        with self._read() as db:
+            total_books, total_stock = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(qty), 0) FROM books").fetchone()
+            n_sales, total_sold, total_revenue = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(qty), 0), COALESCE(SUM(revenue), 0.0) FROM sales").fetchone()
+        return {
+            "total_books": total_books,
+            "total_stock": total_stock,
+            "total_sold": total_sold,
+            "total_revenue": total_revenue,
+            "top_sellers": self.top_sellers(top) if n_sales else [],
+        }
+
+    def total_revenue_numpy(self):
+        total = self._sum_revenue()
+        print(f"(SQL) Total revenue = {total:.2f}")
+        return total
+
+    @_cached
+    def _sum_revenue(self):
+        return self._db.execute("SELECT COALESCE(SUM(revenue), 0.0) FROM sales").fetchone()[0]
+
+    def monthly_revenue(self):
+        # date() returns NULL for strings that aren't valid YYYY-MM-DD
+        # dates, matching the strptime filter in Bookstore
+        rows = self._db.execute(
+            "SELECT substr(date, 1, 7) AS month, SUM(revenue) FROM sales "
+            "WHERE date(date) = date GROUP BY month")
+        return dict(rows.fetchall())
+
+    def daily_revenue(self):
+        rows = self._db.execute(
+            "SELECT date(date) AS day, SUM(revenue) FROM sales "
+            "WHERE day IS NOT NULL GROUP BY day ORDER BY day")
+        return dict(rows.fetchall())
+
+    def _date_index(self):
+        rows = self._db.execute(
+            "SELECT date(date) AS day, SUM(revenue), SUM(qty) FROM sales "
+            "WHERE day IS NOT NULL GROUP BY day ORDER BY day").fetchall()
+        return ([_day_ordinal(d) for d, _, _ in rows],
+                [0.0, *itertools.accumulate(r for _, r, _ in rows)],
+                [0, *itertools.accumulate(q for _, _, q in rows)])
+
+    def totals_between(self, start, end):
+        # canonical dates sort as text, so this is a range scan on sales_date
+        start = datetime.fromordinal(_day_ordinal(start)).strftime("%Y-%m-%d")
+        end = datetime.fromordinal(_day_ordinal(end)).strftime("%Y-%m-%d")
+        revenue, units = self._db.execute(
+            "SELECT COALESCE(SUM(revenue), 0.0), COALESCE(SUM(qty), 0) FROM sales "
+            "WHERE date BETWEEN ? AND ? AND date(date) = date", (start, end)).fetchone()
+        return revenue, units
+
+    def genre_revenue(self):
+        return dict(self._db.execute("SELECT genre, SUM(revenue) FROM sales GROUP BY genre").fetchall())
+
+    def _revenue_by_title(self):
+        return dict(self._db.execute("SELECT title, SUM(revenue) FROM sales GROUP BY title").fetchall())
+
+    def _qty_revenue_corrcoef(self):
+        # Pearson's r from one pass of sums instead of pulling every row
+        n, sx, sy, sxx, syy, sxy = self._db.execute(
+            "SELECT COUNT(*), SUM(qty), SUM(revenue), SUM(qty * qty), SUM(revenue * revenue), SUM(qty * revenue) "
+            "FROM sales").fetchone()
+        vx, vy = sxx - sx * sx / n, syy - sy * sy / n
+        r = (sxy - sx * sy / n) / math.sqrt(vx * vy) if vx > 0 and vy > 0 else math.nan
+        return [[1.0, r], [r, 1.0]]
+
+    def genre_units(self):
+        return dict(self._db.execute("SELECT genre, SUM(qty) FROM sales GROUP BY genre").fetchall())
+
+    def save_snapshot(self, dirname="bookstore.snapshot"):
+        raise ValueError("SQLiteBookstore persists to its database file; export with save_*_csv instead.")
+
+    def load_snapshot(self, dirname="bookstore.snapshot"):
+        raise ValueError("SQLiteBookstore loads from its database file; import CSVs with load_*_csv instead.")
+
+    def open_journal(self, *args, **kwargs):
+        raise ValueError("SQLiteBookstore commits every change as it happens; no journal is needed.")
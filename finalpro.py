@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -17,6 +18,11 @@ class HappinessDashboard:
 
     def __init__(self):
         self.df = None
+        # filter_data's index: the frame it was built for, the row span
+        # of each lower-cased region, and the Year column in that order
+        self._indexed = None
+        self._region_rows = {}
+        self._years = None
 
     # ------------------------- DATA LOADING ------------------------- #
 
@@ -33,6 +39,7 @@ class HappinessDashboard:
 
         df = df.dropna(subset=self.REQUIRED_COLUMNS)
         self.df = df
+        self._index_by_region()
         print("\n✔ Dataset loaded and validated successfully!")
 
     # ------------------------- CALCULATIONS ------------------------- #
@@ -42,7 +49,7 @@ class HappinessDashboard:
         if self.df is None:
             raise ValueError("Dataset not loaded!")
 
-        region_avg = self.df.groupby("Regional indicator")['Happiness score'].mean()
+        region_avg = self.df.groupby("Regional indicator", observed=True)['Happiness score'].mean()
         happiest_country = self.df.loc[self.df['Happiness score'].idxmax(), 'Country']
         avg_life = self.df['Healthy life expectancy'].mean()
 
@@ -54,20 +61,54 @@ class HappinessDashboard:
 
     # ------------------------- FILTERING ------------------------- #
 
+    def _index_by_region(self):
+        """Sort the data by (region, Year) and note where each region's rows are"""
+        df = self.df.astype({'Regional indicator': 'category'})
+        regions = df['Regional indicator'].cat
+        # categories differing only in case share one key, as in the
+        # old case-insensitive comparison
+        keys, key_of_category = np.unique(regions.categories.astype(str).str.lower(), return_inverse=True)
+        codes = key_of_category[regions.codes.to_numpy()]
+        order = np.lexsort((df['Year'].to_numpy(), codes))
+        codes = codes[order]
+        starts = np.searchsorted(codes, np.arange(len(keys)), side='left')
+        stops = np.searchsorted(codes, np.arange(len(keys)), side='right')
+
+        self.df = self._indexed = df.iloc[order]
+        self._region_rows = dict(zip(keys.tolist(), zip(starts.tolist(), stops.tolist())))
+        self._years = self.df['Year'].to_numpy()
+
     def filter_data(self, region=None, start_year=None, end_year=None):
-        """Filter dataset by region and year"""
+        """Filter dataset by region and year.
+
+        Rows are found by binary search over the (region, Year) order set
+        up at load time, and a region filter returns a slice of self.df
+        rather than a copy, so treat the result as read-only.
+        """
         if self.df is None:
             raise ValueError("Dataset not loaded!")
-
-        filtered = self.df.copy()
+        if self._indexed is not self.df:
+            self._index_by_region()
 
         if region:
-            filtered = filtered[filtered['Regional indicator'].str.lower() == region.lower()]
+            spans = [self._region_rows.get(region.lower(), (0, 0))]
+        else:
+            spans = [(0, len(self.df))]
 
         if start_year and end_year:
-            filtered = filtered[(filtered['Year'] >= start_year) & (filtered['Year'] <= end_year)]
-
-        return filtered
+            if not region:
+                spans = list(self._region_rows.values())
+            spans = [(lo + np.searchsorted(self._years[lo:hi], start_year, side='left'),
+                      lo + np.searchsorted(self._years[lo:hi], end_year, side='right'))
+                     for lo, hi in spans]
+
+        if not spans:
+            # year filter on an empty dataset: no regions to search
+            return self.df.iloc[0:0]
+        if len(spans) == 1:
+            lo, hi = spans[0]
+            return self.df.iloc[lo:hi]
+        return self.df.iloc[np.concatenate([np.arange(lo, hi) for lo, hi in spans])]
 
     # ------------------------- VISUALIZATIONS ------------------------- #
 
@@ -93,7 +134,7 @@ class HappinessDashboard:
 
     def plot_pie_chart(self):
         """Average happiness percentage by region"""
-        region_avg = self.df.groupby("Regional indicator")['Happiness score'].mean()
+        region_avg = self.df.groupby("Regional indicator", observed=True)['Happiness score'].mean()
         plt.figure(figsize=(6, 6))
         plt.pie(region_avg, labels=region_avg.index, autopct='%1.1f%%')
         plt.title("Happiness Score Distribution by Region")
@@ -0,0 +1,72 @@
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from bookmarkanalytic import CHARTS, Bookstore, generate_synthetic_data
+from booksqlite import SQLiteBookstore
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def results(store):
+    return store.report_data(5), store.top_sellers(3), [store.chart_data(c) for c in CHARTS]
+
+
+def uncached(store):
+    store._results.clear()
+    return results(store)
+
+
+class ResultCacheTest(unittest.TestCase):
+    """Cached reports must be served warm and never go stale."""
+
+    def check_store(self, store):
+        quiet(generate_synthetic_data, store, 50, 500, seed=1)
+        first = results(store)
+        misses = store.cache_info()["misses"]
+        self.assertEqual(results(store), first)
+        info = store.cache_info()
+        self.assertEqual(info["misses"], misses)
+        self.assertGreater(info["hits"], 0)
+
+        title = store._inventory_records()[3]["title"]
+        for change in (lambda: store.record_sale(title, 1, "2024-05-05"),
+                       lambda: store.record_sales([(title, 2, "2024-05-06")]),
+                       lambda: store.update_book(title, qty=999),
+                       lambda: store.remove_book(title)):
+            version = store.cache_info()["version"]
+            quiet(change)
+            self.assertGreater(store.cache_info()["version"], version)
+            self.assertEqual(results(store), uncached(store))
+        self.assertNotEqual(results(store), first)
+
+    def test_in_memory_stores(self):
+        for kwargs in ({}, {"columnar": True}, {"thread_safe": True}):
+            with self.subTest(**kwargs):
+                self.check_store(Bookstore(**kwargs))
+
+    def test_sqlite_store_sees_other_writers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "store.db")
+            store = SQLiteBookstore(path)
+            try:
+                self.check_store(store)
+                before = store.report_data()
+                other = sqlite3.connect(path)
+                with other:
+                    other.execute("INSERT INTO sales (date, title, qty, revenue, genre) "
+                                  "VALUES ('2024-01-01', 'x', 1, 1.0, '')")
+                other.close()
+                self.assertEqual(store.report_data()["total_sold"], before["total_sold"] + 1)
+            finally:
+                store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import pandas as pd
+
+from finalpro import HappinessDashboard
+
+REGIONS = ["Western Europe", "western europe", "South Asia", "Sub-Saharan Africa"]
+
+
+def baseline_filter(df, region=None, start_year=None, end_year=None):
+    """filter_data as a plain boolean mask, the way it used to be written."""
+    if region:
+        df = df[df['Regional indicator'].str.lower() == region.lower()]
+    if start_year and end_year:
+        df = df[(df['Year'] >= start_year) & (df['Year'] <= end_year)]
+    return df
+
+
+def rows(df):
+    return sorted(map(tuple, df[['Country', 'Year', 'Happiness score']].astype(str).values.tolist()))
+
+
+class FilterDataTest(unittest.TestCase):
+    """The indexed filter_data must pick the same rows as the boolean mask."""
+
+    def setUp(self):
+        rng = random.Random(5)
+        self.df = pd.DataFrame([{
+            'Country': f"Country {i}", 'Regional indicator': rng.choice(REGIONS),
+            'Happiness score': round(rng.uniform(3, 8), 3), 'GDP per capita': 1.0, 'Social support': 1.0,
+            'Healthy life expectancy': 60.0, 'Freedom to make life choices': 0.5, 'Year': rng.randrange(2015, 2024),
+        } for i in range(200)])
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "happiness.csv")
+        self.df.to_csv(path, index=False)
+        self.dashboard = HappinessDashboard()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.dashboard.load_data(path)
+
+    def test_matches_boolean_mask(self):
+        for args in [(), ("western EUROPE",), ("South Asia", 2017, 2020), (None, 2016, 2018),
+                     ("Nowhere",), ("Nowhere", 2016, 2018), (None, 2030, 2031), ("South Asia", 2018)]:
+            with self.subTest(args=args):
+                self.assertEqual(rows(self.dashboard.filter_data(*args)), rows(baseline_filter(self.df, *args)))
+
+    def test_reindexes_a_replaced_frame(self):
+        self.dashboard.df = self.df[self.df['Year'] > 2020]
+        got = self.dashboard.filter_data("South Asia")
+        self.assertEqual(rows(got), rows(baseline_filter(self.df[self.df['Year'] > 2020], "South Asia")))
+
+
+if __name__ == "__main__":
+    unittest.main()
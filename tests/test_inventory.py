@@ -0,0 +1,114 @@
+import contextlib
+import io
+import unittest
+
+from bookmarkanalytic import Bookstore
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def catalog(columnar, n=10):
+    store = Bookstore(columnar=columnar)
+    for i in range(n):
+        quiet(store.add_book, f"Book {i}", "A", "G", 2.0, 10 + i)
+    return store
+
+
+class TitleIndexTest(unittest.TestCase):
+    """find_book_index must agree with a linear scan through adds and removes."""
+
+    def test_positions_follow_removals(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                store = catalog(columnar, 200)
+                for i in range(0, 200, 3):
+                    quiet(store.remove_book, f"Book {i}")
+                quiet(store.add_book, "Book 0", "A", "G", 2.0, 1)
+                titles = [b["title"] for b in store.inventory]
+                for i in range(200):
+                    title = f"Book {i}"
+                    want = titles.index(title) if title in titles else -1
+                    self.assertEqual(store.find_book_index(title.upper()), want)
+
+    def test_first_duplicate_wins_until_removed(self):
+        store = Bookstore()
+        quiet(store._set_inventory, [{"title": "Dune", "author": "A", "genre": "G", "price": 1.0, "qty": q}
+                                     for q in (1, 2)])
+        self.assertEqual(store.inventory[store.find_book_index("dune")]["qty"], 1)
+        quiet(store.remove_book, "Dune")
+        self.assertEqual(store.inventory[store.find_book_index("dune")]["qty"], 2)
+
+
+class RecordSalesValidationTest(unittest.TestCase):
+    """A rejected batch must leave stock and sales untouched."""
+
+    def check_rejected(self, store, rows):
+        stock = [b["qty"] for b in store.inventory]
+        with self.assertRaises(ValueError):
+            quiet(store.record_sales, rows)
+        self.assertEqual([b["qty"] for b in store.inventory], stock)
+        self.assertEqual(len(store.sales), 0)
+        self.assertEqual(store.report_data()["total_sold"], 0)
+
+    def test_bad_batches_change_nothing(self):
+        for columnar in (False, True):
+            store = catalog(columnar)
+            for rows in ([("Book 1", 1), ("Nope", 1)],
+                         [("Book 1", 1), ("Book 2", -1)],
+                         [("Book 1", "many")],
+                         [("Book 1", float("nan"))],
+                         # enough of each row alone, too many together
+                         [("Book 1", 6), ("Book 1", 6)]):
+                with self.subTest(columnar=columnar, rows=rows):
+                    self.check_rejected(store, rows)
+
+    def test_accepted_row_forms(self):
+        store = catalog(False)
+        n = quiet(store.record_sales, [("Book 1", 1), ("Book 2", "2", "2024-01-01"),
+                                       {"title": "book 3", "qty": 3}])
+        self.assertEqual(n, 3)
+        self.assertEqual([b["qty"] for b in store.inventory[1:4]], [10, 10, 10])
+        self.assertEqual(store.sales[2]["title"], "Book 3")
+        self.assertEqual(quiet(store.record_sales, []), 0)
+
+
+class LowStockTest(unittest.TestCase):
+    """The low-stock heap must agree with a scan of the inventory."""
+
+    def scan(self, store, threshold):
+        low = [(b["title"], b["qty"]) for b in store.inventory if b["qty"] <= threshold]
+        return sorted(low, key=lambda tq: tq[1])
+
+    def test_heap_tracks_stock_changes(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                store = catalog(columnar, 20)
+                self.assertEqual(store.low_stock(threshold=12), self.scan(store, 12))
+                quiet(store.record_sale, "Book 15", 14)
+                quiet(store.record_sales, [("Book 19", 20), ("Book 4", 1)])
+                quiet(store.update_book, "Book 0", qty=100)
+                quiet(store.remove_book, "Book 1")
+                quiet(store.add_book, "Book 20", "A", "G", 2.0, 0)
+                self.assertEqual(store.low_stock(threshold=12, limit=50), self.scan(store, 12))
+                self.assertEqual(store.low_stock(threshold=12, limit=2), self.scan(store, 12)[:2])
+
+    def test_reorder_points_and_callback(self):
+        store = catalog(False, 3)
+        fired = []
+        store.on_low_stock(lambda title, qty, point: fired.append((title, qty, point)))
+        quiet(store.set_reorder_point, "Book 2", 11)
+        self.assertEqual(store.low_stock(), [])
+        quiet(store.record_sale, "Book 2", 1)
+        quiet(store.record_sale, "Book 2", 1)
+        self.assertEqual(fired, [("Book 2", 11, 11)])
+        self.assertEqual(store.low_stock(), [("Book 2", 10)])
+        quiet(store.update_book, "Book 2", qty=50)
+        quiet(store.record_sale, "Book 2", 45)
+        self.assertEqual(fired, [("Book 2", 11, 11), ("Book 2", 5, 11)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from bookmarkanalytic import Bookstore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+class JournalCrashTest(unittest.TestCase):
+    """A store killed without close_journal must come back with its stock."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inventory = os.path.join(self.tmp.name, "inventory.csv")
+        self.sales = os.path.join(self.tmp.name, "sales.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def crash(self, body, columnar=False):
+        # run body against a journaled store in a child process, then
+        # kill it with os._exit so nothing is flushed on the way out
+        script = textwrap.dedent(f"""
+            import os, sys
+            from bookmarkanalytic import Bookstore
+            store = Bookstore(columnar={columnar})
+            store.open_journal({self.inventory!r}, {self.sales!r})
+        """) + textwrap.dedent(body) + "\nstore._sales_journal.sync()\nos._exit(0)\n"
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        subprocess.run([sys.executable, "-c", script], check=True, env=env, stdout=subprocess.DEVNULL)
+
+    def reopen(self, columnar=False):
+        store = Bookstore(columnar=columnar)
+        quiet(store.open_journal, self.inventory, self.sales)
+        self.addCleanup(quiet, store.close_journal)
+        return store
+
+    def qty(self, store, title):
+        return store.inventory[store.find_book_index(title)]["qty"]
+
+    def test_sales_after_save_are_taken_off_stock(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                self.crash("""
+                    store.add_book("Dune", "Herbert", "SF", 10, 5)
+                    store.save_inventory_csv(store._inventory_journal.snapshot)
+                    store.record_sale("Dune", 3, "2024-01-01")
+                """, columnar)
+                store = self.reopen(columnar)
+                self.assertEqual(self.qty(store, "Dune"), 2)
+                with self.assertRaises(ValueError):
+                    quiet(store.record_sale, "Dune", 5)
+                self.assertEqual(store.report_data()["total_sold"], 3)
+                quiet(store.close_journal)
+                for path in os.listdir(self.tmp.name):
+                    os.remove(os.path.join(self.tmp.name, path))
+
+    def test_flushed_put_is_not_taken_off_twice(self):
+        self.crash("""
+            store.add_book("Dune", "Herbert", "SF", 10, 5)
+            store.record_sale("Dune", 1, "2024-01-01")
+            store.save_inventory_csv(store._inventory_journal.snapshot)
+            store.record_sale("Dune", 1, "2024-01-02")
+            store.update_book("Dune", qty=20)
+            store.save_inventory_csv(store._inventory_journal.snapshot)
+            store.record_sale("Dune", 2, "2024-01-03")
+        """)
+        store = self.reopen()
+        self.assertEqual(self.qty(store, "Dune"), 18)
+        self.assertEqual(store.report_data()["total_sold"], 4)
+
+    def test_replay_across_compaction(self):
+        self.crash("""
+            store.add_book("Dune", "Herbert", "SF", 10, 9)
+            store.record_sale("Dune", 2, "2024-01-01")
+            store.compact()
+            store.record_sale("Dune", 3, "2024-01-02")
+        """)
+        store = self.reopen()
+        self.assertEqual(self.qty(store, "Dune"), 4)
+        self.assertEqual(store.report_data()["total_sold"], 5)
+
+    def test_clean_close_round_trips(self):
+        store = Bookstore()
+        quiet(store.open_journal, self.inventory, self.sales)
+        quiet(store.add_book, "Dune", "Herbert", "SF", 10, 5)
+        quiet(store.record_sales, [("Dune", 1, "2024-01-01"), ("Dune", 2, "2024-01-02")])
+        quiet(store.close_journal)
+        store = self.reopen()
+        self.assertEqual(self.qty(store, "Dune"), 2)
+        self.assertEqual(store.report_data()["total_sold"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import contextlib
+import csv
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas  # noqa: F401  (loaded so the loaders take the pandas path)
+
+import bookmarkanalytic
+from bookmarkanalytic import Bookstore
+
+SALES = [
+    ["date", "title", "qty", "revenue", "genre"],
+    ["2024-01-05", "Dune", "2", "20.0", "SF"],
+    ["2024-1-6", "Dune", "1", "10.0", ""],
+    ["not a date", "Emma", "3", "15.0", ""],
+    ["2023-12-31", "Gone", "1", "4.5", ""],
+    ["2024-02-29", "Emma", "1", "5.0", "Classic"],
+    ["", "Dune", "4", "40.0", "SF"],
+]
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def summary(store):
+    return {
+        "report": store.report_data(top=5),
+        "monthly": store.monthly_revenue(),
+        "daily": store.daily_revenue(),
+        "genre_revenue": store.genre_revenue(),
+        "genre_units": store.genre_units(),
+        "between": store.totals_between("2023-01-01", "2024-12-31"),
+        "sales": list(store.sales),
+    }
+
+
+class SalesLoaderTest(unittest.TestCase):
+    """The pandas sales loader must build the same state as the csv-module one."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.sales = os.path.join(self.tmp.name, "sales.csv")
+        with open(self.sales, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(SALES)
+
+    def load(self, columnar, pandas_path, chunksize=None):
+        store = Bookstore(columnar=columnar)
+        quiet(store.add_book, "Dune", "Herbert", "SF", 10.0, 50)
+        quiet(store.add_book, "Emma", "Austen", "Classic", 5.0, 50)
+        with mock.patch.object(bookmarkanalytic, "_use_pandas", lambda filename=None: pandas_path):
+            quiet(store.load_sales_csv, self.sales, chunksize=chunksize)
+        # running totals must keep working after a bulk load
+        quiet(store.record_sale, "Emma", 2, "2024-03-01")
+        return summary(store)
+
+    def test_pandas_loader_matches_csv_loader(self):
+        for columnar in (False, True):
+            expected = self.load(columnar, pandas_path=False)
+            for chunksize in (None, 2):
+                with self.subTest(columnar=columnar, chunksize=chunksize):
+                    self.assertEqual(self.load(columnar, pandas_path=True, chunksize=chunksize), expected)
+
+    def test_blank_genres_come_from_the_catalog(self):
+        genres = self.load(False, pandas_path=True)["genre_units"]
+        self.assertEqual(genres, {"SF": 7, "Classic": 6, "": 1})
+
+    def test_blank_quantity_is_rejected(self):
+        with open(self.sales, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(["2024-01-07", "Dune", "", "1.0", "SF"])
+        with self.assertRaises(ValueError):
+            self.load(False, pandas_path=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import contextlib
+import csv
+import io
+import os
+import tempfile
+import unittest
+
+import bookmarkanalytic
+from bookpartition import FLUSH_ROWS, PartitionedBookstore
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+class PartitionedCliTest(unittest.TestCase):
+    """The --partitions CLI must keep every imported sale."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.inventory = os.path.join(self.tmp.name, "inventory.csv")
+        self.sales = os.path.join(self.tmp.name, "sales.csv")
+        self.parts = os.path.join(self.tmp.name, "parts")
+        with open(self.inventory, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["title", "author", "genre", "price", "qty"])
+            w.writerow(["Dune", "Herbert", "SF", "10.0", "5"])
+        # more rows than one buffer holds, so a tail is left unflushed
+        self.rows = FLUSH_ROWS + FLUSH_ROWS // 2
+        with open(self.sales, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["date", "title", "qty", "revenue", "genre"])
+            for i in range(self.rows):
+                w.writerow([f"2024-{i % 12 + 1:02d}-01", "Dune", "1", "10.0", "SF"])
+
+    def main(self, *argv):
+        return quiet(bookmarkanalytic.main, ["--inventory", self.inventory, "--sales", self.sales,
+                                             "--partitions", self.parts, *argv])
+
+    def test_first_import_survives_a_command_that_does_not_save(self):
+        self.assertEqual(self.main("search", "dune"), 0)
+        store = PartitionedBookstore(self.parts, processes=1)
+        self.assertEqual(store.report_data()["total_sold"], self.rows)
+
+    def test_load_snapshot_is_refused(self):
+        store = PartitionedBookstore(self.parts, processes=1)
+        with self.assertRaises(ValueError):
+            store.load_snapshot(os.path.join(self.tmp.name, "snap"))
+
+
+class PartitionedTotalsTest(unittest.TestCase):
+    """Partition aggregates must match an in-memory store fed the same sales."""
+
+    def test_matches_in_memory_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stores = [bookmarkanalytic.Bookstore(), PartitionedBookstore(os.path.join(tmp, "parts"), processes=1)]
+            for store in stores:
+                for i in range(4):
+                    quiet(store.add_book, f"Book {i}", "A", f"G{i % 2}", 3.0 + i, 1_000)
+                quiet(store.record_sales, [(f"Book {i % 4}", 1 + i % 3, f"202{3 + i % 2}-{i % 12 + 1:02d}-15")
+                                           for i in range(300)])
+                quiet(store.record_sale, "Book 1", 2, "not a date")
+            memory, parts = stores
+            self.assertEqual(parts.top_sellers(4), memory.top_sellers(4))
+            self.assertEqual(parts.genre_units(), memory.genre_units())
+            for got, want in ((parts.monthly_revenue(), memory.monthly_revenue()),
+                              (parts.genre_revenue(), memory.genre_revenue())):
+                self.assertEqual(sorted(got), sorted(want))
+                for key in want:
+                    self.assertAlmostEqual(got[key], want[key], places=6)
+            self.assertEqual(parts.report_data()["total_sold"], memory.report_data()["total_sold"])
+            parts.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import random
+import unittest
+from unittest import mock
+
+import bookmarkanalytic
+from bookmarkanalytic import Bookstore, TitleSearchIndex
+
+WORDS = ["deep", "silent", "empire", "night", "mind", "journey", "river", "stone", "glass", "north"]
+QUERIES = ["deep nigt", "silnt empre", "rivr", "glass ston", "north"]
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+class TitleSearchIndexTest(unittest.TestCase):
+    """An index kept current by add/remove must answer like a fresh one."""
+
+    def test_prefix_then_fuzzy(self):
+        index = TitleSearchIndex(["Deep Work", "Deep Night", "Silent Empire", "deeper still"])
+        self.assertEqual(index.search("DEEP"), ["Deep Night", "Deep Work", "deeper still"])
+        self.assertEqual(index.search("silnt empire", 1), ["Silent Empire"])
+        self.assertEqual(index.search("  "), [])
+        self.assertEqual(len(index), 4)
+
+    @mock.patch.object(TitleSearchIndex, "COMPACT_SLACK", 0)
+    def test_updates_match_a_rebuild(self):
+        rng = random.Random(3)
+        live = {f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}" for i in range(300)}
+        index = TitleSearchIndex(live)
+        for step in range(600):
+            if step % 2:
+                title = rng.choice(sorted(live))
+                index.remove(title)
+                live.discard(title)
+            else:
+                title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {1000 + step}"
+                index.add(title)
+                live.add(title)
+            if step % 100 == 99:
+                fresh = TitleSearchIndex(sorted(live))
+                for q in QUERIES:
+                    self.assertEqual(index.search(q), fresh.search(q), (step, q))
+        # removed ids are compacted away rather than piling up
+        for title in sorted(live)[:-5]:
+            index.remove(title)
+        self.assertEqual(len(index), 5)
+        self.assertLessEqual(len(index._id_keys), 10)
+        self.assertEqual(index.search("deep nigt"), TitleSearchIndex(sorted(live)[-5:]).search("deep nigt"))
+
+    def test_without_numpy_gives_the_same_answers(self):
+        titles = [f"{a} {b}" for a in WORDS for b in WORDS]
+        expected = {q: TitleSearchIndex(titles).search(q) for q in QUERIES}
+        with mock.patch.object(bookmarkanalytic, "np", None):
+            index = TitleSearchIndex(titles)
+            index.remove("deep night")
+            index.add("deep night")
+            for q in QUERIES:
+                self.assertEqual(index.search(q), expected[q])
+
+
+class StoreSearchTest(unittest.TestCase):
+    """search_titles must follow catalog changes once the index is built."""
+
+    def test_built_index_follows_the_catalog(self):
+        store = Bookstore()
+        quiet(store.add_book, "Deep Work", "A", "G", 1.0, 1)
+        store.build_index()
+        quiet(store.add_book, "Deep Night", "A", "G", 1.0, 1)
+        self.assertEqual(store.search_titles("deep"), ["Deep Night", "Deep Work"])
+        quiet(store.remove_book, "Deep Work")
+        self.assertEqual(store.search_titles("deep"), ["Deep Night"])
+        quiet(store._set_inventory, [{"title": "Silent Empire", "author": "A", "genre": "G", "price": 1.0, "qty": 1}])
+        self.assertIsNotNone(store._search_index)
+        self.assertEqual(store.search_titles("silent"), ["Silent Empire"])
+
+
+if __name__ == "__main__":
+    unittest.main()
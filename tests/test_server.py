@@ -0,0 +1,91 @@
+import asyncio
+import socket
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from bookmarkanalytic import Bookstore
+from bookserver import BookstoreClient, BookstoreService
+
+
+class ServiceTest(unittest.TestCase):
+    """Drive a BookstoreService on a background loop through BookstoreClient."""
+
+    def setUp(self):
+        self.store = Bookstore()
+        self.store.add_book("Dune", "Herbert", "SF", 10.0, 100)
+        self.service = BookstoreService(self.store, batch_window=0.01)
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.server = self.loop.run_until_complete(self.service.start("127.0.0.1", 0))
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait()
+        self.port = self.server.sockets[0].getsockname()[1]
+        # registered first so it runs after the clients' cleanups
+        self.addCleanup(self.stop_loop)
+
+    def stop_loop(self):
+        async def shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def client(self):
+        client = BookstoreClient("127.0.0.1", self.port, timeout=5)
+        self.addCleanup(client.close)
+        return client
+
+    def test_round_trip(self):
+        client = self.client()
+        client.add_book("Emma", "Austen", "Classic", 8.0, 3)
+        client.record_sale("Dune", 2, "2024-01-01")
+        report = client.report()
+        self.assertEqual(report["total_sold"], 2)
+        self.assertEqual(report["total_revenue"], 20.0)
+        self.assertEqual({b["title"] for b in client.inventory()}, {"Dune", "Emma"})
+        with self.assertRaises(ValueError):
+            client.record_sale("Nope", 1)
+
+    def test_bad_sale_does_not_stall_its_batch(self):
+        bad = [{"title": 123, "qty": 1}, ["Dune", 1], {"title": "Dune", "qty": [1]}]
+
+        def post(payload):
+            client = BookstoreClient("127.0.0.1", self.port, timeout=5)
+            try:
+                client._call("POST", "/sales", payload)
+                return "ok"
+            except ValueError:
+                return "rejected"
+            finally:
+                client.close()
+
+        payloads = [{"title": "Dune", "qty": 1}] * 5 + bad
+        with ThreadPoolExecutor(len(payloads)) as pool:
+            results = list(pool.map(post, payloads))
+        self.assertEqual(results, ["ok"] * 5 + ["rejected"] * len(bad))
+        self.assertEqual(self.client().report()["total_sold"], 5)
+
+    def test_malformed_request_gets_400(self):
+        for raw in (b"GARBAGE\r\n\r\n", b"POST /sales HTTP/1.1\r\nContent-Length: x\r\n\r\n"):
+            with self.subTest(raw=raw), socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+                sock.sendall(raw)
+                self.assertTrue(sock.recv(1024).startswith(b"HTTP/1.1 400"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bookmarkanalytic import Bookstore, SalesLedger
+
+DATES = ["2024-01-05", "2024-1-6", "not a date", "2023-12-31", "2024-02-29"]
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+class SnapshotTest(unittest.TestCase):
+    """save_snapshot/load_snapshot must round-trip every backend."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dirname = os.path.join(self.tmp.name, "snap")
+
+    def saved_store(self, columnar):
+        store = Bookstore(columnar=columnar)
+        for i in range(6):
+            quiet(store.add_book, f"Book {i}", f"Author {i % 2}", f"Genre {i % 3}", 2.5 + i, 100)
+        quiet(store.record_sales, [(f"Book {i % 6}", 1 + i % 3, DATES[i % len(DATES)]) for i in range(40)])
+        quiet(store.save_snapshot, self.dirname)
+        return store
+
+    def test_round_trip(self):
+        for saved in (False, True):
+            store = self.saved_store(saved)
+            for loaded in (False, True):
+                with self.subTest(saved=saved, loaded=loaded):
+                    copy = Bookstore(columnar=loaded)
+                    quiet(copy.load_snapshot, self.dirname)
+                    self.assertEqual(list(copy.sales), list(store.sales))
+                    self.assertEqual([b["qty"] for b in copy.inventory], [b["qty"] for b in store.inventory])
+                    self.assertEqual(copy.top_sellers(6), store.top_sellers(6))
+                    self.assertEqual(copy.daily_revenue().keys(), store.daily_revenue().keys())
+                    self.assertEqual(copy._sale_day_array().tolist(), store._sale_day_array().tolist())
+                    # the loaded store keeps taking sales
+                    quiet(copy.record_sale, "Book 1", 1, "2024-03-01")
+                    self.assertEqual(copy.report_data()["total_sold"], store.report_data()["total_sold"] + 1)
+
+    def test_columnar_load_does_not_parse_dates(self):
+        self.saved_store(True)
+        copy = Bookstore(columnar=True)
+        with mock.patch.object(SalesLedger, "_encode_day", side_effect=AssertionError("date parsed")):
+            quiet(copy.load_snapshot, self.dirname)
+        self.assertEqual(len(copy.sales), 40)
+        self.assertEqual(sorted({s["date"] for s in copy.sales}), sorted(DATES))
+
+    def test_other_versions_are_refused(self):
+        self.saved_store(False)
+        meta = os.path.join(self.dirname, "meta.json")
+        with open(meta, encoding="utf-8") as f:
+            data = json.load(f)
+        data["version"] -= 1
+        with open(meta, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        with self.assertRaises(ValueError):
+            quiet(Bookstore().load_snapshot, self.dirname)
+
+
+if __name__ == "__main__":
+    unittest.main()
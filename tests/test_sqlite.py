@@ -0,0 +1,107 @@
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+from bookmarkanalytic import Bookstore
+from booksqlite import SQLiteBookstore
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+class SQLiteThreadTest(unittest.TestCase):
+    """Threads sharing one SQLiteBookstore must not share a transaction."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SQLiteBookstore(os.path.join(self.tmp.name, "store.db"))
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.store.close)
+        for i in range(4):
+            quiet(self.store.add_book, f"Book {i}", "A", "G", 2.0, 10_000)
+
+    def test_concurrent_writers_and_reader(self):
+        writers, sales_each = 4, 300
+        errors = []
+        done = threading.Event()
+
+        def write(n):
+            try:
+                for _ in range(sales_each):
+                    quiet(self.store.record_sale, f"Book {n}", 1, "2024-03-01")
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                while not done.is_set():
+                    report = self.store.report_data()
+                    self.assertEqual(report["total_stock"] + report["total_sold"], 40_000)
+            except Exception as e:
+                errors.append(e)
+
+        reader = threading.Thread(target=read)
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(writers)]
+        reader.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        done.set()
+        reader.join()
+
+        self.assertEqual(errors, [])
+        report = self.store.report_data()
+        self.assertEqual(report["total_sold"], writers * sales_each)
+        self.assertEqual(report["total_stock"], 40_000 - writers * sales_each)
+
+
+class SQLiteViewTest(unittest.TestCase):
+    """inventory/sales views and SQL chart aggregates must match the in-memory store."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SQLiteBookstore(os.path.join(self.tmp.name, "store.db"))
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.store.close)
+        self.memory = Bookstore()
+        for store in (self.store, self.memory):
+            for i in range(5):
+                quiet(store.add_book, f"Book {i}", "A", f"G{i % 2}", 1.5 + i, 100)
+
+    def record(self):
+        sales = [(f"Book {i % 5}", 1 + i % 4, f"2024-0{1 + i % 6}-10") for i in range(30)]
+        for store in (self.store, self.memory):
+            quiet(store.record_sales, sales)
+
+    def test_views_behave_like_lists(self):
+        self.assertFalse(self.store.sales)
+        self.assertIsNone(self.store.chart_data("pie"))
+        self.record()
+        self.assertTrue(self.store.sales)
+        self.assertEqual(len(self.store.sales), 30)
+        self.assertEqual(list(self.store.sales), self.memory.sales)
+        self.assertEqual(list(self.store.inventory), self.memory.inventory)
+        self.assertEqual(self.store.sales[-1], self.memory.sales[-1])
+        self.assertEqual(self.store.sales[3:7], self.memory.sales[3:7])
+        with self.assertRaises(IndexError):
+            self.store.inventory[5]
+
+    def test_chart_aggregates_match_memory_store(self):
+        self.record()
+        pie, expected = self.store.chart_data("pie"), self.memory.chart_data("pie")
+        self.assertEqual(pie["labels"], expected["labels"])
+        for got, want in zip(pie["values"], expected["values"]):
+            self.assertAlmostEqual(got, want)
+        matrix = self.store.chart_data("heatmap")["matrix"]
+        for got, want in zip(sum(matrix, []), sum(self.memory.chart_data("heatmap")["matrix"], [])):
+            self.assertAlmostEqual(got, want)
+
+
+if __name__ == "__main__":
+    unittest.main()
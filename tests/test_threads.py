@@ -0,0 +1,73 @@
+import contextlib
+import io
+import sys
+import threading
+import unittest
+
+from bookmarkanalytic import Bookstore
+
+BOOKS, STOCK, BATCHES = 20, 1_000, 20
+
+
+class ThreadSafeStoreTest(unittest.TestCase):
+    """Reports running next to writers must never see a half-applied write."""
+
+    def check_invariant(self, columnar):
+        store = Bookstore(columnar=columnar, thread_safe=True)
+        errors = []
+        done = threading.Event()
+
+        def bulk_writer():
+            try:
+                for _ in range(BATCHES):
+                    store.record_sales([(f"Book {i % BOOKS}", 1, "2024-05-01") for i in range(BOOKS * 25)])
+            except Exception as e:
+                errors.append(e)
+
+        def single_writer():
+            try:
+                for n in range(STOCK // 4):
+                    store.record_sale(f"Book {n % BOOKS}", 1, "2024-05-02")
+            except Exception as e:
+                errors.append(e)
+
+        def reader():
+            try:
+                while not done.is_set():
+                    report = store.report_data(top=0)
+                    if report["total_stock"] + report["total_sold"] != BOOKS * STOCK:
+                        errors.append(AssertionError(f"torn report: {report}"))
+                        return
+            except Exception as e:
+                errors.append(e)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(BOOKS):
+                store.add_book(f"Book {i}", "A", "G", 1.0, STOCK)
+            readers = [threading.Thread(target=reader) for _ in range(2)]
+            writers = [threading.Thread(target=bulk_writer), threading.Thread(target=single_writer)]
+            for t in readers + writers:
+                t.start()
+            for t in writers:
+                t.join()
+            done.set()
+            for t in readers:
+                t.join()
+
+        self.assertEqual(errors, [])
+        report = store.report_data(top=0)
+        self.assertEqual(report["total_sold"], BATCHES * BOOKS * 25 + STOCK // 4)
+        self.assertEqual(report["total_stock"] + report["total_sold"], BOOKS * STOCK)
+
+    def test_reports_see_whole_writes(self):
+        # switch threads often so a report lands inside a write
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                self.check_invariant(columnar)
+
+
+if __name__ == "__main__":
+    unittest.main()
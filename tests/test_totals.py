@@ -0,0 +1,85 @@
+import contextlib
+import io
+import unittest
+
+from bookmarkanalytic import Bookstore, _parse_date
+
+DATES = ["2024-01-05", "2024-1-6", "not a date", "2023-12-31", "2024-02-29", "2024-01-05"]
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def recomputed(sales):
+    """The running totals, rebuilt from scratch out of the sale rows."""
+    monthly, daily, genre_revenue, genre_units, units = {}, {}, {}, {}, {}
+    for s in sales:
+        day = _parse_date(s["date"])
+        if day is not None:
+            month = day.strftime("%Y-%m")
+            monthly[month] = monthly.get(month, 0.0) + s["revenue"]
+            daily[day.isoformat()] = daily.get(day.isoformat(), 0.0) + s["revenue"]
+        genre_revenue[s["genre"]] = genre_revenue.get(s["genre"], 0.0) + s["revenue"]
+        genre_units[s["genre"]] = genre_units.get(s["genre"], 0) + s["qty"]
+        units[s["title"]] = units.get(s["title"], 0) + s["qty"]
+    return monthly, daily, genre_revenue, genre_units, units
+
+
+class RunningTotalsTest(unittest.TestCase):
+    """Totals kept up as sales arrive must equal a recount of the ledger."""
+
+    def build(self, columnar):
+        store = Bookstore(columnar=columnar)
+        for i in range(5):
+            quiet(store.add_book, f"Book {i}", "A", f"G{i % 2}", 1.25 + i, 500)
+        for i in range(12):
+            quiet(store.record_sale, f"Book {i % 5}", 1 + i % 3, DATES[i % len(DATES)])
+        quiet(store.record_sales, [(f"Book {i % 4}", 2, DATES[i % len(DATES)]) for i in range(30)])
+        quiet(store.update_book, "Book 4", qty=7)
+        quiet(store.remove_book, "Book 3")
+        return store
+
+    def assertTotalsMatch(self, got, want):
+        self.assertEqual(sorted(got), sorted(want))
+        for key in want:
+            self.assertAlmostEqual(got[key], want[key], places=6)
+
+    def test_totals_match_a_recount(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                store = self.build(columnar)
+                sales = list(store.sales)
+                monthly, daily, genre_revenue, genre_units, units = recomputed(sales)
+                self.assertTotalsMatch(store.monthly_revenue(), monthly)
+                self.assertTotalsMatch(store.daily_revenue(), daily)
+                self.assertTotalsMatch(store.genre_revenue(), genre_revenue)
+                self.assertEqual(store.genre_units(), genre_units)
+                self.assertEqual(dict(store.top_sellers(10)), units)
+
+                report = store.report_data()
+                self.assertEqual(report["total_sold"], sum(s["qty"] for s in sales))
+                self.assertAlmostEqual(report["total_revenue"], sum(s["revenue"] for s in sales), places=6)
+                self.assertEqual(report["total_stock"], sum(b["qty"] for b in store.inventory))
+
+    def test_totals_between(self):
+        store = self.build(False)
+        sales = list(store.sales)
+        first, last = _parse_date("2024-01-01"), _parse_date("2024-01-31")
+        in_january = [s for s in sales if _parse_date(s["date"]) and first <= _parse_date(s["date"]) <= last]
+        revenue, units = store.totals_between("2024-01-01", "2024-01-31")
+        self.assertAlmostEqual(revenue, sum(s["revenue"] for s in in_january), places=6)
+        self.assertEqual(units, sum(s["qty"] for s in in_january))
+        self.assertEqual(store.totals_between("2030-01-01", "2030-12-31"), (0.0, 0))
+
+    def test_back_dated_sale_updates_ranges(self):
+        store = self.build(True)
+        before = store.units_between("2020-01-01", "2020-12-31")
+        quiet(store.record_sale, "Book 0", 3, "2020-06-01")
+        self.assertEqual(store.units_between("2020-01-01", "2020-12-31"), before + 3)
+        self.assertEqual(store.rolling(1, "2020-06-01", "2020-06-01"), {"2020-06-01": (3 * 1.25, 3)})
+
+
+if __name__ == "__main__":
+    unittest.main()